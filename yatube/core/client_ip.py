@@ -0,0 +1,22 @@
+"""Адрес клиента с учетом обратного прокси.
+
+За прокси REMOTE_ADDR - адрес самого прокси, и все клиенты выглядят
+одним адресом. Если запрос пришел с адреса из TRUSTED_PROXIES, клиентом
+считается самый правый адрес X-Forwarded-For, который не принадлежит
+доверенному прокси: левее клиент может вписать что угодно. От остальных
+адресов заголовок не читается.
+"""
+from django.conf import settings
+
+
+def client_ip(request):
+    remote = request.META.get('REMOTE_ADDR', '')
+    trusted = settings.TRUSTED_PROXIES
+    if remote not in trusted:
+        return remote
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    for address in reversed(forwarded.split(',')):
+        address = address.strip()
+        if address and address not in trusted:
+            return address
+    return remote
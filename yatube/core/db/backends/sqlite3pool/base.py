@@ -0,0 +1,51 @@
+"""Бэкенд SQLite с пулом соединений (core.db.pool).
+
+Настройки пула - ключ POOL в описании базы:
+
+    'ENGINE': 'core.db.backends.sqlite3pool',
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 5, 'MAX_LIFETIME': 600,
+             'CHECK_INTERVAL': 30},
+
+Django закрывает соединение в конце запроса (CONN_MAX_AGE = 0), а этот
+бэкенд вместо закрытия возвращает его в пул, откатив незавершенную
+транзакцию. База в памяти (тесты) работает как обычный sqlite3: ее
+соединение закрывать нельзя, а пулу там нечего экономить.
+"""
+from django.db.backends.sqlite3 import base
+from django.utils.functional import cached_property
+
+from core.db.pool import get_pool, PoolTimeout
+
+Database = base.Database
+
+
+def ping(connection):
+    connection.execute('SELECT 1').fetchone()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @cached_property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict['NAME'],
+                        self.settings_dict.get('POOL', {}), health_check=ping)
+
+    def get_new_connection(self, conn_params):
+        if self.is_in_memory_db():
+            return super().get_new_connection(conn_params)
+        connect = super().get_new_connection
+        try:
+            return self.pool.checkout(lambda: connect(conn_params))
+        except PoolTimeout as error:
+            raise Database.OperationalError(str(error)) from error
+
+    def _close(self):
+        if self.connection is None or self.is_in_memory_db():
+            return super()._close()
+        # Соединение с ошибками или брошенное внутри atomic не переиспользуем
+        discard = self.errors_occurred or self.in_atomic_block
+        if not discard and self.connection.in_transaction:
+            try:
+                self.connection.rollback()
+            except Database.Error:
+                discard = True
+        self.pool.checkin(self.connection, discard=discard)
@@ -0,0 +1,200 @@
+"""Ограниченный пул соединений с БД на процесс.
+
+Пул хранит не больше max_size открытых соединений (занятых и свободных).
+Если все заняты, checkout() ждет освобождения до timeout секунд и
+бросает PoolTimeout. Соединение старше max_lifetime закрывается вместо
+возврата в пул, а свободное дольше check_interval секунд перед выдачей
+проверяется health_check и при ошибке заменяется новым. stats() - метрики
+пула: ожидание, занятые и свободные соединения, пересоздания.
+"""
+import collections
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, max_size=10, timeout=5.0, max_lifetime=600.0,
+                 check_interval=30.0, health_check=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self.health_check = health_check
+        self._condition = threading.Condition()
+        # Свободные соединения: (соединение, когда открыто, когда вернулось)
+        self._idle = collections.deque()
+        self._opened = {}
+        self._in_use = 0
+        self._stats = collections.Counter()
+        self._max_wait = 0.0
+
+    @property
+    def size(self):
+        return self._in_use + len(self._idle)
+
+    def checkout(self, connect):
+        """Свободное соединение из пула или новое от connect()."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            item = self._reserve(deadline)
+            if item is None:
+                connection = self._open(connect)
+                self._record_wait(started)
+                return connection
+            connection, opened, returned = item
+            now = time.monotonic()
+            if now - opened >= self.max_lifetime:
+                self._discard(connection, 'recycled')
+            elif (now - returned >= self.check_interval
+                  and not self._is_healthy(connection)):
+                self._discard(connection, 'unhealthy')
+            else:
+                self._record_wait(started)
+                return connection
+
+    def checkin(self, connection, discard=False):
+        """Возвращает соединение в пул; discard=True закрывает его."""
+        opened = self._opened.get(id(connection))
+        if opened is None:
+            # Соединение не из этого пула (например, открыто до fork)
+            self._close(connection)
+            return
+        if discard:
+            self._discard(connection, 'discarded')
+        elif time.monotonic() - opened >= self.max_lifetime:
+            self._discard(connection, 'recycled')
+        else:
+            with self._condition:
+                self._in_use -= 1
+                self._idle.append((connection, opened, time.monotonic()))
+                self._condition.notify()
+
+    def _reserve(self, deadline):
+        """Занимает свободное соединение или место под новое (None)."""
+        with self._condition:
+            while True:
+                if self._idle:
+                    self._in_use += 1
+                    # Последнее возвращенное - самое "теплое"
+                    return self._idle.pop()
+                if self.size < self.max_size:
+                    self._in_use += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'Нет свободного соединения за {self.timeout} с '
+                        f'(пул на {self.max_size})'
+                    )
+                self._stats['waits'] += 1
+                self._condition.wait(remaining)
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opened[id(connection)] = time.monotonic()
+            self._stats['opened'] += 1
+        return connection
+
+    def _is_healthy(self, connection):
+        if self.health_check is None:
+            return True
+        try:
+            self.health_check(connection)
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection, reason):
+        with self._condition:
+            self._in_use -= 1
+            self._opened.pop(id(connection), None)
+            self._stats[reason] += 1
+            self._condition.notify()
+        self._close(connection)
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _record_wait(self, started):
+        waited = time.monotonic() - started
+        with self._condition:
+            self._stats['checkouts'] += 1
+            self._stats['wait_seconds'] += waited
+            self._max_wait = max(self._max_wait, waited)
+
+    def stats(self):
+        with self._condition:
+            checkouts = self._stats['checkouts']
+            return {
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': checkouts,
+                'waits': self._stats['waits'],
+                'timeouts': self._stats['timeouts'],
+                'wait_seconds_total': self._stats['wait_seconds'],
+                'wait_seconds_max': self._max_wait,
+                'wait_seconds_avg': (self._stats['wait_seconds'] / checkouts
+                                     if checkouts else 0.0),
+                'opened': self._stats['opened'],
+                'recycled': self._stats['recycled'],
+                'unhealthy': self._stats['unhealthy'],
+                'discarded': self._stats['discarded'],
+            }
+
+    def close_idle(self):
+        """Закрывает все свободные соединения."""
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+            for connection, _, _ in idle:
+                self._opened.pop(id(connection), None)
+        for connection, _, _ in idle:
+            self._close(connection)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, name, options, health_check=None):
+    """Пул базы name под псевдонимом alias в текущем процессе; после fork
+    создается новый."""
+    key = (os.getpid(), alias, name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 5.0),
+                max_lifetime=options.get('MAX_LIFETIME', 600.0),
+                check_interval=options.get('CHECK_INTERVAL', 30.0),
+                health_check=health_check,
+            )
+        return pool
+
+
+def pool_stats():
+    """Метрики пулов текущего процесса: {alias: stats()}."""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = {alias: pool for (owner, alias, _), pool in _pools.items()
+                 if owner == pid}
+    return {alias: pool.stats() for alias, pool in pools.items()}
@@ -0,0 +1,84 @@
+"""Чтение с реплики, запись в основную базу.
+
+PrimaryReplicaRouter отправляет чтения в REPLICA_DATABASE_ALIAS, если
+такая база настроена, а запись - в default. Чтобы пользователь сразу
+видел свои изменения (read-your-writes), после любой записи чтения до
+конца запроса идут в основную базу, а ReplicaPinMiddleware ставит cookie,
+закрепляющую за основной базой и запросы следующих REPLICA_PIN_SECONDS
+секунд - пока реплика догоняет. Чтения внутри транзакции основной базы
+тоже идут в нее: сигналы сохранения должны видеть свои же записи.
+Модели приложений PRIMARY_ONLY_APPS (сессии, очередь задач) всегда
+читаются из основной базы: отставание реплики не должно разлогинивать
+пользователей и возвращать исполнителю уже выполненные задачи.
+"""
+import contextlib
+import contextvars
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'primary_db'
+
+_pinned = contextvars.ContextVar('pinned_to_primary', default=False)
+_wrote = contextvars.ContextVar('wrote_to_primary', default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', 'replica')
+    return alias if alias in connections.databases else None
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Все чтения внутри блока - из основной базы."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def __init__(self, replica=None):
+        self.replica = replica
+
+    def db_for_read(self, model, **hints):
+        replica = self.replica or replica_alias()
+        if (replica is None or _pinned.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block
+                or model._meta.app_label in settings.PRIMARY_ONLY_APPS):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика - копия основной базы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему реплика получает вместе с данными (sync_replica)
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = _pinned.set(PIN_COOKIE in request.COOKIES)
+        wrote = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                response.set_cookie(
+                    PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True, samesite='Lax',
+                )
+        finally:
+            _pinned.reset(pinned)
+            _wrote.reset(wrote)
+        return response
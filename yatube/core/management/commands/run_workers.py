@@ -0,0 +1,61 @@
+import os
+import threading
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from core.tasks import Worker
+
+
+class Command(BaseCommand):
+    help = 'Запускает исполнителей фоновых задач (core.tasks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=2,
+            help='Сколько задач выполнять параллельно',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            help='Как часто проверять очередь, секунды '
+                 '(по умолчанию TASK_POLL_INTERVAL)',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выполнить готовые задачи и выйти',
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], LocMemCache):
+            # Задачи сбрасывают кэш лент, а в LocMemCache у этого процесса
+            # свой кэш: веб-процессы продолжали бы отдавать старые страницы
+            raise CommandError(
+                'run_workers нужен общий с веб-процессами кэш (Memcached, '
+                'Redis, DatabaseCache), а не LocMemCache. С одним '
+                'веб-процессом задачи выполняют его потоки '
+                '(TASK_WORKER_THREADS).'
+            )
+        prefix = f'{os.uname().nodename}:{os.getpid()}'
+        workers = [Worker(f'{prefix}:{number}',
+                          poll_interval=options['poll_interval'])
+                   for number in range(options['threads'])]
+        threads = [threading.Thread(target=worker.run,
+                                    kwargs={'burst': options['burst']},
+                                    name=f'tasks-{number}')
+                   for number, worker in enumerate(workers)]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f'Исполнителей: {len(workers)}')
+        try:
+            for thread in threads:
+                # join с таймаутом, чтобы Ctrl+C дошел до главного потока
+                while thread.is_alive():
+                    thread.join(1)
+        except KeyboardInterrupt:
+            self.stdout.write('Останавливаю исполнителей...')
+            for worker in workers:
+                worker.stop()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS('Готово'))
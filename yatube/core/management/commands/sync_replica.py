@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from core.db_router import replica_alias
+
+
+def copy_sqlite(source, target):
+    """Копирует базу SQLite целиком через backup API: копия согласована,
+    даже если в источник в это время пишут."""
+    source_db = sqlite3.connect(source)
+    target_db = sqlite3.connect(target)
+    try:
+        source_db.backup(target_db)
+    finally:
+        target_db.close()
+        source_db.close()
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплику (для локального '
+            'запуска с YATUBE_REPLICA)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять копирование каждые столько секунд',
+        )
+
+    def handle(self, *args, **options):
+        replica = replica_alias()
+        if replica is None:
+            raise CommandError('Реплика не настроена: задайте YATUBE_REPLICA')
+        databases = [connections.databases[alias]
+                     for alias in (DEFAULT_DB_ALIAS, replica)]
+        if any(connections[alias].vendor != 'sqlite'
+               for alias in (DEFAULT_DB_ALIAS, replica)):
+            raise CommandError('Копирование поддерживается только для '
+                               'SQLite; реплику другой СУБД ведет она сама')
+        source, target = (database['NAME'] for database in databases)
+        # Открытые соединения с репликой увидят новую копию
+        connections[replica].close()
+        while True:
+            started = time.monotonic()
+            copy_sqlite(source, target)
+            self.stdout.write(self.style.SUCCESS(
+                f'Реплика обновлена за {time.monotonic() - started:.2f} с'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
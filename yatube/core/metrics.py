@@ -0,0 +1,277 @@
+"""Метрики приложения в текстовом формате Prometheus.
+
+Счетчики и гистограммы живут в памяти процесса; каждый процесс сервера
+отдает свои значения на /metrics, а Prometheus суммирует их сам. Запись
+метрики - словарь и блокировка, поэтому сбор можно не выключать.
+
+MetricsMiddleware считает запросы, их длительность и SQL-запросы по
+представлениям, InstrumentedTemplates - время рендеринга шаблонов.
+Значения, которые дешевле прочитать при опросе (пул соединений, кэш
+лент), собирают функции из collectors.
+"""
+import bisect
+import contextlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+registry = []
+collectors = []
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\').replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+    return f'{{{pairs}}}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name}: ожидаются метки '
+                             f'{", ".join(self.labelnames)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return list(zip(self.labelnames, key))
+
+    def samples(self):
+        """Строки (суффикс имени, метки, значение)."""
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield '', self._labels(key), value
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {escape(self.documentation)}',
+                 f'# TYPE {self.name} {self.type}']
+        for suffix, labels, value in self.samples():
+            lines.append(f'{self.name}{suffix}{format_labels(labels)} '
+                         f'{format_value(value)}')
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """Значение счетчика, который копится вне метрик (пул, кэш)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels))
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Индекс первой границы, не меньшей value; за последней - +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1),
+                                             0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total)
+                      for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield '_bucket', labels + [('le', format_value(bound))], \
+                    cumulative
+            yield '_sum', labels, total
+            yield '_count', labels, cumulative
+
+
+def collector(func):
+    """Регистрирует функцию, обновляющую метрики перед выдачей."""
+    collectors.append(func)
+    return func
+
+
+def expose():
+    """Все метрики в текстовом формате Prometheus."""
+    for func in collectors:
+        func()
+    lines = []
+    for metric in registry:
+        lines.extend(metric.expose())
+    return '\n'.join(lines) + '\n'
+
+
+REQUESTS = Counter(
+    'yatube_http_requests_total', 'Обработанные HTTP-запросы',
+    ('view', 'method', 'status'),
+)
+REQUEST_SECONDS = Histogram(
+    'yatube_http_request_duration_seconds',
+    'Длительность обработки запроса', ('view',),
+)
+DB_QUERIES = Counter(
+    'yatube_db_queries_total', 'SQL-запросы во время HTTP-запросов',
+    ('view',),
+)
+DB_QUERY_SECONDS = Counter(
+    'yatube_db_query_seconds_total',
+    'Суммарное время SQL-запросов во время HTTP-запросов', ('view',),
+)
+TEMPLATE_SECONDS = Histogram(
+    'yatube_template_render_seconds', 'Время рендеринга шаблона',
+    ('template',),
+)
+THUMBNAIL_SECONDS = Histogram(
+    'yatube_thumbnail_generation_seconds',
+    'Время создания миниатюр одного поста',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'yatube_db_pool_connections', 'Соединения в пуле',
+    ('alias', 'state'),
+)
+DB_POOL_CHECKOUTS = Counter(
+    'yatube_db_pool_checkouts_total', 'Выдачи соединений из пула',
+    ('alias',),
+)
+DB_POOL_WAIT_SECONDS = Counter(
+    'yatube_db_pool_wait_seconds_total',
+    'Суммарное ожидание соединения из пула', ('alias',),
+)
+DB_POOL_TIMEOUTS = Counter(
+    'yatube_db_pool_timeouts_total',
+    'Отказы из-за исчерпания пула', ('alias',),
+)
+
+
+@collector
+def collect_pool():
+    from core.db.pool import pool_stats
+
+    for alias, stats in pool_stats().items():
+        DB_POOL_CONNECTIONS.set(stats['in_use'], alias=alias, state='in_use')
+        DB_POOL_CONNECTIONS.set(stats['idle'], alias=alias, state='idle')
+        DB_POOL_CHECKOUTS.set_total(stats['checkouts'], alias=alias)
+        DB_POOL_WAIT_SECONDS.set_total(stats['wait_seconds_total'],
+                                       alias=alias)
+        DB_POOL_TIMEOUTS.set_total(stats['timeouts'], alias=alias)
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(timer))
+            response = self.get_response(request)
+        view = view_label(request)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, view=view)
+        REQUESTS.inc(view=view, method=request.method,
+                     status=response.status_code)
+        if timer.count:
+            DB_QUERIES.inc(timer.count, view=view)
+            DB_QUERY_SECONDS.inc(timer.seconds, view=view)
+        return response
@@ -0,0 +1,59 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Фоновая задача очереди core.tasks."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(verbose_name='Задача', max_length=200)
+    # Аргументы задачи в JSON: {"args": [...], "kwargs": {...}}
+    payload = models.TextField(verbose_name='Аргументы', default='{}')
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    max_attempts = models.PositiveIntegerField(
+        verbose_name='Наибольшее число попыток',
+        default=3
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Выполнить не раньше',
+        default=timezone.now
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Взята в работу',
+        null=True,
+        blank=True
+    )
+    locked_by = models.CharField(
+        verbose_name='Исполнитель',
+        max_length=100,
+        blank=True
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+
+    class Meta:
+        # Исполнитель выбирает ожидающие задачи по времени запуска
+        indexes = [models.Index(fields=['status', 'run_at'],
+                                name='task_due_idx')]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
@@ -0,0 +1,94 @@
+"""Бюджет SQL-запросов на одно представление.
+
+Представление объявляет бюджет декоратором @query_budget(n), а
+QueryBudgetMiddleware считает запросы за весь цикл запроса, включая
+рендеринг шаблона, и пишет предупреждение в лог (или бросает исключение
+при QUERY_BUDGET_ACTION = 'raise'), если бюджет превышен.
+"""
+import contextlib
+import logging
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Объявляет максимальное число SQL-запросов для представления."""
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+def get_query_budget(view_func):
+    return getattr(view_func, 'query_budget', None)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextlib.contextmanager
+def count_queries():
+    """Считает SQL-запросы ко всем базам внутри блока."""
+    counter = QueryCounter()
+    with contextlib.ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(counter))
+        yield counter
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            return self.get_response(request)
+        with count_queries() as counter:
+            response = self.get_response(request)
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and counter.count > budget:
+            self.report(request, counter.count, budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func)
+
+    def report(self, request, count, budget):
+        message = (f'{request.resolver_match.view_name}: '
+                   f'{count} SQL-запросов при бюджете {budget}')
+        if getattr(settings, 'QUERY_BUDGET_ACTION', 'log') == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class QueryBudgetTestMixin:
+    """Проверка бюджета запросов для TestCase."""
+
+    def assertWithinQueryBudget(self, client, path, data=None):
+        budget = get_query_budget(resolve(path).func)
+        self.assertIsNotNone(
+            budget, f'Для {path} не объявлен бюджет запросов'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path, data)
+        self.assertLessEqual(
+            len(queries), budget,
+            '\n'.join([f'{path}: {len(queries)} запросов при бюджете '
+                       f'{budget}'] + [q['sql'] for q in queries])
+        )
+        return response
@@ -0,0 +1,100 @@
+"""Ограничение частоты запросов к записывающим представлениям.
+
+Лимиты задаются в RATE_LIMITS: имя -> 'число/период' (s, m, h, d),
+например '10/m'. Декоратор @ratelimit('имя') считает запросы методов
+methods (по умолчанию только POST, чтение лимиты не трогают) отдельно
+для каждого пользователя, а для анонимов - для IP-адреса.
+
+Окно скользящее: счетчики текущего и предыдущего окна лежат в кэше,
+а вклад предыдущего убывает пропорционально прошедшему времени. На
+проверку уходит один get_many и один incr. Отклоненный запрос получает
+429 с Retry-After и попадает в метрику yatube_ratelimit_rejections_total.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from . import metrics
+from .client_ip import client_ip
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+REJECTIONS = metrics.Counter(
+    'yatube_ratelimit_rejections_total',
+    'Запросы, отклоненные ограничением частоты', ('scope',),
+)
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def user_or_ip(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return ip(request)
+
+
+def ip(request):
+    return f'ip:{client_ip(request)}'
+
+
+def retry_after(previous, current, limit, window, elapsed):
+    """Через сколько секунд оценка окна опустится ниже лимита."""
+    if current >= limit:
+        # Ждать следующего окна, пока вклад текущего не убудет
+        wait = window - elapsed + window * (1 - limit / current)
+    else:
+        wait = window * (1 - (limit - current) / previous) - elapsed
+    return max(1, math.ceil(wait))
+
+
+def hit(scope, identity, rate, now=None):
+    """Учитывает запрос; None - пропустить, иначе Retry-After в секундах."""
+    limit, window = parse_rate(rate)
+    now = time.time() if now is None else now
+    number, elapsed = divmod(now, window)
+    digest = hashlib.md5(identity.encode()).hexdigest()
+    current_key = f'ratelimit:{scope}:{digest}:{int(number)}'
+    previous_key = f'ratelimit:{scope}:{digest}:{int(number) - 1}'
+    counts = cache.get_many([current_key, previous_key])
+    previous = counts.get(previous_key, 0)
+    current = counts.get(current_key, 0)
+    if previous * (1 - elapsed / window) + current >= limit:
+        return retry_after(previous, current, limit, window, elapsed)
+    try:
+        cache.incr(current_key)
+    except ValueError:
+        # Ключа нет или он только что вытеснен: окно живет два периода
+        if not cache.add(current_key, 1, 2 * window):
+            cache.incr(current_key)
+    return None
+
+
+def ratelimit(scope, key=user_or_ip, methods=('POST',)):
+    """Ограничивает представление лимитом RATE_LIMITS[scope]."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            rate = settings.RATE_LIMITS.get(scope)
+            if (not settings.RATELIMIT_ENABLED or rate is None
+                    or request.method not in methods):
+                return view_func(request, *args, **kwargs)
+            wait = hit(scope, key(request), rate)
+            if wait is None:
+                return view_func(request, *args, **kwargs)
+            REJECTIONS.inc(scope=scope)
+            response = render(request, 'core/429.html',
+                              {'retry_after': wait}, status=429)
+            response['Retry-After'] = str(wait)
+            return response
+        return inner
+    return decorator
@@ -0,0 +1,184 @@
+"""Статика с хешем в имени, сжатая заранее и отдаваемая до представлений.
+
+collectstatic с CompressedManifestStorage кладет в STATIC_ROOT копии
+файлов с хешем содержимого в имени (css/bootstrap.min.3c5e0a.css) и рядом
+с текстовыми файлами - сжатые варианты .gz и, если установлен модуль
+brotli, .br. {% static %} после этого выдает имена с хешем.
+
+StaticFilesMiddleware стоит первым в MIDDLEWARE: один раз при запуске
+составляет список файлов STATIC_ROOT и отвечает на запросы к STATIC_URL
+сам, не доходя до сессий, метрик и представлений. Вариант файла
+выбирается по Accept-Encoding, имена с хешем кэшируются навсегда
+(immutable), остальные - на STATIC_CACHE_MAX_AGE секунд.
+"""
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # без brotli собираются только .gz
+    brotli = None
+
+# Кодировки в порядке предпочтения: Content-Encoding -> расширение
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.txt', '.html', '.json',
+                '.xml', '.ico')
+# Файлы меньше этого не сжимаются: выигрыш меньше заголовков
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def compress(data):
+    """Сжатые варианты data: расширение -> байты; только те, что меньше."""
+    variants = {'.gz': gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items()
+            if len(body) < len(data)}
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который еще и сжимает собранные файлы."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted({*paths, *self.hashed_files.values()}):
+            if name.endswith(COMPRESSIBLE):
+                self.compress_file(name)
+
+    def compress_file(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, body in compress(data).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(body))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic еще не запускался (разработка, тесты) - файлы
+            # отдает staticfiles под исходными именами
+            return name
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, которые клиент не запретил q=0."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    if '*' in accepted:
+        accepted.update(encoding for encoding, _ in ENCODINGS)
+    return accepted
+
+
+class StaticFile:
+    """Файл из STATIC_ROOT и его сжатые варианты."""
+
+    def __init__(self, path, immutable):
+        self.immutable = immutable
+        self.content_type = (mimetypes.guess_type(path)[0]
+                             or 'application/octet-stream')
+        self.variants = {None: self.stat(path)}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                self.variants[encoding] = self.stat(path + suffix)
+
+    @staticmethod
+    def stat(path):
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        return path, stat.st_size, etag, http_date(stat.st_mtime)
+
+    def choose(self, accept_encoding):
+        """Кодировка и вариант файла для заголовка Accept-Encoding."""
+        if len(self.variants) > 1:
+            accepted = accepted_encodings(accept_encoding)
+            for encoding, _ in ENCODINGS:
+                if encoding in accepted and encoding in self.variants:
+                    return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+
+def scan(root):
+    """Путь в URL -> StaticFile для всех файлов root."""
+    hashed = set(getattr(staticfiles_storage, 'load_manifest', dict)()
+                 .values())
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                continue
+            path = os.path.join(directory, name)
+            url = os.path.relpath(path, root).replace(os.sep, '/')
+            files[url] = StaticFile(path, url in hashed)
+    return files
+
+
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        root = settings.STATIC_ROOT
+        if settings.DEBUG or not root or not os.path.isdir(root):
+            # В разработке статику отдает runserver из STATICFILES_DIRS
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = scan(root)
+
+    def __call__(self, request):
+        path = request.path_info
+        if (request.method in ('GET', 'HEAD')
+                and path.startswith(self.prefix)):
+            static_file = self.files.get(path[len(self.prefix):])
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    def serve(self, request, static_file):
+        encoding, (path, size, etag, modified) = static_file.choose(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse()
+            response['Content-Length'] = size
+        else:
+            response = FileResponse(open(path, 'rb'))
+        if response.status_code == 200:
+            response['Content-Type'] = static_file.content_type
+            response['Last-Modified'] = modified
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if len(static_file.variants) > 1:
+            response['Vary'] = 'Accept-Encoding'
+        response['ETag'] = etag
+        response['Cache-Control'] = (
+            IMMUTABLE if static_file.immutable
+            else f'public, max-age={settings.STATIC_CACHE_MAX_AGE}'
+        )
+        return response
@@ -0,0 +1,212 @@
+"""Очередь фоновых задач в таблице базы (core.models.Task).
+
+Функция, объявленная задачей (@task), ставится в очередь вызовом
+func.enqueue(*args): строка Task пишется в той же транзакции, что и
+данные, которые ее породили, поэтому задача не теряется при падении
+процесса и не выполняется для откатившейся транзакции. Аргументы -
+JSON-совместимые значения (id, а не объекты моделей).
+
+Задачи выполняют исполнители (Worker): потоки веб-процесса, если
+TASK_WORKER_THREADS > 0 (запускаются при старте из wsgi.py, чтобы
+задачи, оставшиеся с прошлого запуска, не ждали новой), и команда
+run_workers. Исполнитель помечает
+задачу занятой одним UPDATE, поэтому несколько исполнителей не берут ее
+дважды. Упавшая задача повторяется с экспоненциальной задержкой, после
+max_attempts попыток остается в таблице со статусом failed. Задача,
+занятая дольше TASK_LOCK_TIMEOUT (исполнитель умер), снова доступна.
+Доставка "хотя бы один раз": задачи должны быть идемпотентными.
+"""
+import json
+import logging
+import os
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .db_router import use_primary
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+TASKS = metrics.Counter(
+    'yatube_tasks_total', 'Выполненные фоновые задачи', ('task', 'result'),
+)
+
+registry = {}
+
+
+def task(max_attempts=3, retry_delay=5):
+    """Объявляет функцию задачей очереди; retry_delay - задержка перед
+    первым повтором в секундах, дальше она удваивается."""
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        func.task_name = name
+        func.max_attempts = max_attempts
+        func.retry_delay = retry_delay
+        func.enqueue = lambda *args, **kwargs: enqueue(func, *args, **kwargs)
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, *args, **kwargs):
+    created = Task.objects.create(
+        name=func.task_name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        max_attempts=func.max_attempts,
+    )
+    transaction.on_commit(wake_workers)
+    return created
+
+
+def get_task(name):
+    if name not in registry:
+        # Модуль задачи еще не импортирован в этом процессе
+        import_string(name)
+    return registry[name]
+
+
+def claim(worker, limit):
+    """Занимает до limit готовых к выполнению задач."""
+    now = timezone.now()
+    available = Q(status=Task.PENDING, run_at__lte=now) | Q(
+        status=Task.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT),
+    )
+    candidates = Task.objects.filter(available).order_by(
+        'run_at', 'pk'
+    ).values_list('pk', flat=True)[:limit]
+    claimed = [pk for pk in candidates
+               if Task.objects.filter(available, pk=pk).update(
+                   status=Task.RUNNING, locked_at=now, locked_by=worker,
+                   attempts=F('attempts') + 1,
+               )]
+    return list(Task.objects.filter(pk__in=claimed).order_by('run_at', 'pk'))
+
+
+def execute(job):
+    """Выполняет занятую задачу: удаляет ее или планирует повтор."""
+    try:
+        func = get_task(job.name)
+        payload = json.loads(job.payload)
+        # Задача должна видеть только что записанные данные
+        with use_primary():
+            func(*payload.get('args', ()), **payload.get('kwargs', {}))
+    except Exception:
+        logger.exception('Задача %s (%s) упала', job.name, job.pk)
+        job.last_error = traceback.format_exc()
+        job.locked_by = ''
+        if job.attempts >= job.max_attempts:
+            job.status = Task.FAILED
+            TASKS.inc(task=job.name, result='failed')
+        else:
+            job.status = Task.PENDING
+            delay = getattr(registry.get(job.name), 'retry_delay', 5)
+            job.run_at = timezone.now() + timedelta(
+                seconds=delay * 2 ** (job.attempts - 1)
+            )
+            TASKS.inc(task=job.name, result='retried')
+        job.save(update_fields=['status', 'run_at', 'last_error',
+                                'locked_by'])
+        return False
+    Task.objects.filter(pk=job.pk).delete()
+    TASKS.inc(task=job.name, result='done')
+    return True
+
+
+class Worker:
+    def __init__(self, name, poll_interval=None, batch_size=10):
+        self.name = name
+        self.poll_interval = (settings.TASK_POLL_INTERVAL
+                              if poll_interval is None else poll_interval)
+        self.batch_size = batch_size
+        self.stop_event = threading.Event()
+
+    def run_once(self):
+        """Выполняет одну пачку задач, возвращает их число."""
+        jobs = claim(self.name, self.batch_size)
+        for job in jobs:
+            execute(job)
+        return len(jobs)
+
+    def run(self, burst=False):
+        """Выполняет задачи до stop(); burst=True - пока очередь не пуста.
+
+        Ошибка базы (например, "database is locked") не останавливает
+        исполнителя: соединения закрываются, и после паузы он продолжает.
+        """
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    if self.run_once():
+                        continue
+                except Exception:
+                    if burst:
+                        raise
+                    logger.exception('Исполнитель %s: сбой очереди задач',
+                                     self.name)
+                    connections.close_all()
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                if burst:
+                    return
+                # Соединение возвращается в пул, пока исполнитель ждет
+                connections.close_all()
+                _wake.wait(self.poll_interval)
+                _wake.clear()
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.stop_event.set()
+        _wake.set()
+
+
+def run_pending(name='inline'):
+    """Выполняет все готовые задачи в текущем потоке (тесты, отладка)."""
+    worker = Worker(name)
+    total = 0
+    while True:
+        done = worker.run_once()
+        if not done:
+            return total
+        total += done
+
+
+_wake = threading.Event()
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def start_workers(count):
+    """Запускает count потоков-исполнителей в этом процессе (один раз)."""
+    pid = os.getpid()
+    with _workers_lock:
+        if pid in _workers:
+            return _workers[pid]
+        workers = []
+        for number in range(count):
+            worker = Worker(f'{os.uname().nodename}:{pid}:{number}')
+            threading.Thread(target=worker.run, daemon=True,
+                             name=f'tasks-{number}').start()
+            workers.append(worker)
+        _workers[pid] = workers
+        return workers
+
+
+def start_configured_workers():
+    """Запускает TASK_WORKER_THREADS исполнителей, если они включены."""
+    if settings.TASK_WORKER_THREADS:
+        start_workers(settings.TASK_WORKER_THREADS)
+
+
+def wake_workers():
+    start_configured_workers()
+    _wake.set()
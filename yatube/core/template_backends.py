@@ -0,0 +1,20 @@
+"""Шаблонизатор Django с замером времени рендеринга (core.metrics)."""
+from django.template.backends.django import DjangoTemplates, Template
+
+from .metrics import TEMPLATE_SECONDS
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        name = self.template.name or '<string>'
+        with TEMPLATE_SECONDS.time(template=name):
+            return super().render(context, request)
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template,
+                             self)
@@ -6,3 +6,19 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.simple_tag(takes_context=True)
+def query_replace(context, **params):
+    """Текущая строка запроса с замененными параметрами.
+
+    Параметры со значением None удаляются:
+    {% query_replace page=2 cursor=None %}
+    """
+    query = context['request'].GET.copy()
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return query.urlencode()
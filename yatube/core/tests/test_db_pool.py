@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from ..db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_reuses_returned_connection(self):
+        pool = ConnectionPool(max_size=2)
+        connection = pool.checkout(FakeConnection)
+        pool.checkin(connection)
+        self.assertIs(pool.checkout(FakeConnection), connection)
+        stats = pool.stats()
+        self.assertEqual((stats['opened'], stats['checkouts']), (1, 2))
+        self.assertEqual((stats['in_use'], stats['idle']), (1, 0))
+
+    def test_bounded_checkout_waits_then_times_out(self):
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        connection = pool.checkout(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(FakeConnection)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+        timer = threading.Timer(0.05, pool.checkin, [connection])
+        pool.timeout = 5
+        timer.start()
+        self.assertIs(pool.checkout(FakeConnection), connection)
+        timer.join()
+        stats = pool.stats()
+        self.assertGreater(stats['wait_seconds_max'], 0)
+        self.assertEqual(stats['opened'], 1)
+
+    def test_recycles_old_connections(self):
+        pool = ConnectionPool(max_lifetime=0)
+        connection = pool.checkout(FakeConnection)
+        pool.checkin(connection)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.checkout(FakeConnection), connection)
+        self.assertEqual(pool.stats()['recycled'], 1)
+
+    def test_unhealthy_idle_connection_is_replaced(self):
+        def health_check(connection):
+            if connection is broken:
+                raise RuntimeError('соединение разорвано')
+
+        pool = ConnectionPool(check_interval=0, health_check=health_check)
+        broken = pool.checkout(FakeConnection)
+        pool.checkin(broken)
+        fresh = pool.checkout(FakeConnection)
+        self.assertIsNot(fresh, broken)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.stats()['unhealthy'], 1)
+
+    def test_discard_frees_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0)
+        connection = pool.checkout(FakeConnection)
+        pool.checkin(connection, discard=True)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.checkout(FakeConnection), connection)
+
+
+class PooledBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.connections = ConnectionHandler({'default': {
+            'ENGINE': 'core.db.backends.sqlite3pool',
+            'NAME': os.path.join(directory.name, 'pool.sqlite3'),
+            'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0},
+        }})
+        self.connection = self.connections['default']
+        self.pool = self.connection.pool
+        self.addCleanup(self.pool.close_idle)
+
+    def test_close_returns_connection_to_pool(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = self.connection.connection
+        self.connection.close()
+        self.assertEqual(self.pool.stats()['idle'], 1)
+        self.connection.ensure_connection()
+        self.assertIs(self.connection.connection, raw)
+        self.assertEqual(self.pool.stats()['opened'], 1)
+        self.connection.close()
+
+    def test_open_transaction_is_rolled_back(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE note (text TEXT)')
+        self.connection.set_autocommit(False)
+        with self.connection.cursor() as cursor:
+            cursor.execute("INSERT INTO note VALUES ('черновик')")
+        self.connection.close()
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM note')
+            self.assertEqual(cursor.fetchone(), (0,))
+        self.connection.close()
+
+    def test_exhausted_pool_raises_database_error(self):
+        self.connection.ensure_connection()
+        other = ConnectionHandler({'default': self.connection.settings_dict})
+        with self.assertRaises(OperationalError):
+            other['default'].ensure_connection()
+        self.connection.close()
@@ -0,0 +1,113 @@
+import contextvars
+import os
+import sqlite3
+import tempfile
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.core.management import call_command, CommandError
+from django.http import HttpResponse
+from django.test import override_settings, RequestFactory, SimpleTestCase
+
+from posts import feed_cache
+from posts.conditional import feed_condition
+from posts.models import Post
+
+from ..db_router import (PIN_COOKIE, PrimaryReplicaRouter,
+                         ReplicaPinMiddleware, replica_alias, use_primary)
+from ..management.commands.sync_replica import copy_sqlite
+
+
+def isolated(func):
+    """Запускает тест в чистом контексте: закрепление за основной базой
+    из других тестов (и в них) не переходит."""
+    def wrapper(*args, **kwargs):
+        return contextvars.Context().run(func, *args, **kwargs)
+    return wrapper
+
+
+@override_settings(REPLICA_PIN_SECONDS=5)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter(replica='replica')
+
+    @isolated
+    def test_reads_go_to_replica_until_write(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    @isolated
+    def test_sessions_read_from_primary(self):
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    @isolated
+    def test_use_primary(self):
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    @isolated
+    def test_middleware_pins_reads_after_write(self):
+        """После записи пользователь получает cookie, и его следующие
+        запросы читают основную базу."""
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(Post))
+            if request.method == 'POST':
+                self.router.db_for_write(Post)
+            return HttpResponse()
+
+        middleware = ReplicaPinMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = middleware(factory.post('/'))
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        pinned = factory.get('/')
+        pinned.COOKIES[PIN_COOKIE] = '1'
+        middleware(pinned)
+        middleware(factory.get('/'))
+        self.assertEqual(reads, ['replica', 'replica', 'default', 'replica'])
+
+    @isolated
+    def test_cached_and_validated_pages_read_primary(self):
+        """Страницы с ETag и рендеры в кэш лент не читают отстающую
+        реплику: их версия уже учитывает последнюю запись."""
+        reads = []
+
+        @feed_condition(lambda: {feed_cache.INDEX})
+        def view(request):
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        view(request)
+        feed_cache.get_or_render(
+            'test-router-fragment',
+            lambda: reads.append(self.router.db_for_read(Post)) or 'html',
+        )
+        self.assertEqual(reads, ['default', 'default'])
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+
+class SyncReplicaTests(SimpleTestCase):
+    def test_copy_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'primary.sqlite3')
+            target = os.path.join(directory, 'replica.sqlite3')
+            with sqlite3.connect(source) as db:
+                db.execute('CREATE TABLE posts (text TEXT)')
+                db.execute("INSERT INTO posts VALUES ('Пост')")
+            copy_sqlite(source, target)
+            with sqlite3.connect(target) as db:
+                rows = db.execute('SELECT text FROM posts').fetchall()
+        self.assertEqual(rows, [('Пост',)])
+
+    def test_command_requires_replica(self):
+        if replica_alias() is not None:
+            self.skipTest('Реплика настроена')
+        with self.assertRaises(CommandError):
+            call_command('sync_replica')
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.template.loader import render_to_string
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from .. import metrics
+
+
+class MetricsFormatTests(TestCase):
+    def setUp(self):
+        self.histogram = metrics.Histogram('test_seconds', 'Тест', ('view',),
+                                           buckets=(0.1, 1))
+        self.addCleanup(metrics.registry.remove, self.histogram)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for value in (0.05, 0.5, 5):
+            self.histogram.observe(value, view='a"b')
+        lines = self.histogram.expose()
+        self.assertEqual(lines[1], '# TYPE test_seconds histogram')
+        self.assertEqual(lines[2:], [
+            'test_seconds_bucket{view="a\\"b",le="0.1"} 1',
+            'test_seconds_bucket{view="a\\"b",le="1"} 2',
+            'test_seconds_bucket{view="a\\"b",le="+Inf"} 3',
+            'test_seconds_sum{view="a\\"b"} 5.55',
+            'test_seconds_count{view="a\\"b"} 3',
+        ])
+
+    def test_labels_are_checked(self):
+        with self.assertRaises(ValueError):
+            self.histogram.observe(1)
+
+
+class MetricsEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='reader')
+
+    def test_request_view_sql_and_template_metrics(self):
+        view = 'posts:index'
+        requests = metrics.REQUESTS.value(view=view, method='GET',
+                                          status=200)
+        queries = metrics.DB_QUERIES.value(view=view)
+        renders = metrics.TEMPLATE_SECONDS.count(template='posts/index.html')
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            metrics.REQUESTS.value(view=view, method='GET', status=200),
+            requests + 1,
+        )
+        self.assertGreater(metrics.DB_QUERIES.value(view=view), queries)
+        self.assertEqual(
+            metrics.TEMPLATE_SECONDS.count(template='posts/index.html'),
+            renders + 1,
+        )
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'],
+                         'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('# TYPE yatube_http_request_duration_seconds '
+                      'histogram', body)
+        self.assertIn('yatube_http_request_duration_seconds_count'
+                      '{view="posts:index"}', body)
+        self.assertIn('yatube_feed_cache_lookups_total{result="miss"}', body)
+
+    def test_template_render_time_outside_views(self):
+        before = metrics.TEMPLATE_SECONDS.count(template='core/403.html')
+        render_to_string('core/403.html')
+        self.assertEqual(
+            metrics.TEMPLATE_SECONDS.count(template='core/403.html'),
+            before + 1,
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_endpoint_is_restricted(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(TRUSTED_PROXIES=['127.0.0.1'])
+    def test_proxied_requests_are_not_local(self):
+        """За локальным прокси проверяется адрес клиента, а не прокси."""
+        response = self.client.get(reverse('metrics'),
+                                   HTTP_X_FORWARDED_FOR='203.0.113.5')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='секрет', METRICS_ALLOWED_IPS=[])
+    def test_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer секрет')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, override_settings, TestCase,
+                         TransactionTestCase)
+from django.urls import reverse
+
+from posts import views
+from posts.models import Follow, Group, Post
+from posts.timeline import fan_out_post
+
+from ..models import Task
+
+from ..query_budget import QueryBudgetExceeded
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_ACTION='raise')
+class QueryBudgetMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = User.objects.create_user(username='budget_user')
+        Post.objects.create(author=user, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_view_within_budget(self):
+        """Страница в пределах бюджета отдается как обычно."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_view_over_budget_raises(self):
+        """Превышение бюджета приводит к QueryBudgetExceeded."""
+        budget = views.index.query_budget
+        views.index.query_budget = 0
+        try:
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('posts:index'))
+        finally:
+            views.index.query_budget = budget
+
+    @override_settings(QUERY_BUDGET_ACTION='log')
+    def test_view_over_budget_logs(self):
+        budget = views.index.query_budget
+        views.index.query_budget = 0
+        try:
+            with self.assertLogs('core.query_budget', 'WARNING'):
+                self.client.get(reverse('posts:index'))
+        finally:
+            views.index.query_budget = budget
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_ACTION='raise')
+class WriteBudgetTests(TransactionTestCase):
+    """Запись поста вне тестовой транзакции, как в работе: BEGIN, а не
+    SAVEPOINT."""
+    # Без транзакции теста чтения уходят на реплику, если она настроена
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='budget_author')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.group = Group.objects.create(title='Группа', slug='budget')
+        # Бюджеты рассчитаны на холодный кэш: сессия и пользователь из БД
+        cache.clear()
+
+    def create_post(self):
+        response = self.client.post(reverse('posts:create_post'), {
+            'text': 'Пост', 'group': self.group.pk,
+        })
+        self.assertEqual(response.status_code, 302)
+
+    def test_first_post_in_group(self):
+        self.create_post()
+        self.assertEqual(self.user.stats.posts_count, 1)
+
+    def test_post_with_followers_enqueues_fan_out(self):
+        reader = User.objects.create_user(username='budget_reader')
+        Follow.objects.create(user=reader, author=self.user)
+        self.create_post()
+        self.assertTrue(Task.objects.filter(
+            name=fan_out_post.task_name
+        ).exists())
+
+    def test_edit_with_new_group(self):
+        post = Post.objects.create(author=self.user, text='Текст',
+                                   group=self.group)
+        other = Group.objects.create(title='Другая', slug='other')
+        response = self.client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': 'Новый текст', 'group': other.pk},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Post.objects.get(pk=post.pk).group, other)
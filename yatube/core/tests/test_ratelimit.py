@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from ..ratelimit import hit, REJECTIONS
+
+
+class SlidingWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_window_slides(self):
+        self.assertIsNone(hit('test', 'ip:1', '2/m', now=600))
+        self.assertIsNone(hit('test', 'ip:1', '2/m', now=610))
+        self.assertEqual(hit('test', 'ip:1', '2/m', now=620), 40)
+        # Другой адрес считается отдельно
+        self.assertIsNone(hit('test', 'ip:2', '2/m', now=620))
+        # Половина следующего окна: от предыдущего осталась 1 из 2
+        self.assertIsNone(hit('test', 'ip:1', '2/m', now=690))
+        # Вклад предыдущего окна убывает: место освободится через секунду
+        self.assertEqual(hit('test', 'ip:1', '2/m', now=690), 1)
+        self.assertIsNone(hit('test', 'ip:1', '2/m', now=700))
+        # Текущее окно заполнено: ждать до следующего
+        self.assertEqual(hit('test', 'ip:1', '2/m', now=700), 20)
+
+
+@override_settings(RATE_LIMITS={'post_create': '2/m', 'login': '1/m'})
+class RateLimitedViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='writer')
+        self.client.force_login(self.user)
+
+    def test_post_create_returns_429(self):
+        url = reverse('posts:create_post')
+        rejected = REJECTIONS.value(scope='post_create')
+        for number in range(2):
+            response = self.client.post(url, {'text': f'Пост {number}'})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(url, {'text': 'Лишний пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(REJECTIONS.value(scope='post_create'), rejected + 1)
+        # Чтение формы не ограничено
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_login_limited_per_ip(self):
+        url = reverse('users:login')
+        data = {'username': 'writer', 'password': 'неверный'}
+        self.client.post(url, data)
+        self.assertEqual(self.client.post(url, data).status_code, 429)
+        response = self.client.post(url, data, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(TRUSTED_PROXIES=['127.0.0.1'])
+    def test_login_limited_per_client_behind_proxy(self):
+        """За доверенным прокси клиенты различаются по X-Forwarded-For,
+        а подделанный клиентом адрес слева не помогает."""
+        url = reverse('users:login')
+        data = {'username': 'writer', 'password': 'неверный'}
+
+        def login(forwarded):
+            return self.client.post(url, data, REMOTE_ADDR='127.0.0.1',
+                                    HTTP_X_FORWARDED_FOR=forwarded)
+
+        login('10.0.0.1')
+        self.assertEqual(login('1.2.3.4, 10.0.0.1').status_code, 429)
+        self.assertEqual(login('10.0.0.2').status_code, 200)
+        # Заголовок от недоверенного адреса не читается
+        response = self.client.post(url, data, REMOTE_ADDR='10.0.0.3',
+                                    HTTP_X_FORWARDED_FOR='10.0.0.9')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(url, data, REMOTE_ADDR='10.0.0.3',
+                                    HTTP_X_FORWARDED_FOR='10.0.0.8')
+        self.assertEqual(response.status_code, 429)
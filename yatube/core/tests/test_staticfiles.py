@@ -0,0 +1,100 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import override_settings, SimpleTestCase
+
+from ..staticfiles import accepted_encodings, brotli, IMMUTABLE
+
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = 'css/bootstrap.min.css'
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class CollectedStaticTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(settings.STATICFILES_DIRS[0], CSS),
+                  'rb') as file:
+            cls.css = file.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        if response.status_code == 200:
+            response.body = b''.join(response.streaming_content)
+        return response
+
+    def test_collect_writes_hashed_and_compressed_files(self):
+        url = static(CSS)
+        self.assertRegex(url, r'^/static/css/bootstrap\.min\.\w{12}\.css$')
+        hashed = staticfiles_storage.stored_name(CSS)
+        with staticfiles_storage.open(hashed + '.gz') as file:
+            self.assertEqual(gzip.decompress(file.read()), self.css)
+        self.assertEqual(staticfiles_storage.exists(hashed + '.br'),
+                         brotli is not None)
+        # PNG уже сжат
+        logo = staticfiles_storage.stored_name('img/logo.png')
+        self.assertFalse(staticfiles_storage.exists(logo + '.gz'))
+
+    def test_serves_hashed_file_compressed_and_immutable(self):
+        response = self.get(static(CSS), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(gzip.decompress(response.body), self.css)
+        # Метрики, сессии и представления запрос не видят
+        self.assertIsNone(response.wsgi_request.resolver_match)
+
+    def test_encoding_negotiation(self):
+        cases = ('', 'identity', 'gzip;q=0, deflate', 'br;q=0')
+        if brotli is None:
+            cases += ('br',)
+        for header in cases:
+            with self.subTest(accept_encoding=header):
+                response = self.get(static(CSS), HTTP_ACCEPT_ENCODING=header)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.body, self.css)
+        self.assertEqual(accepted_encodings('br;q=0.5, gzip;q=0, *;q=0'),
+                         {'br'})
+
+    def test_not_modified(self):
+        response = self.get(static(CSS), HTTP_ACCEPT_ENCODING='gzip')
+        again = self.get(static(CSS), HTTP_ACCEPT_ENCODING='gzip',
+                         HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['Cache-Control'], IMMUTABLE)
+        plain = self.get(static(CSS), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(plain.status_code, 200)
+
+    def test_unhashed_name_and_head(self):
+        response = self.client.head('/static/img/logo.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={settings.STATIC_CACHE_MAX_AGE}')
+        self.assertFalse(response.has_header('Vary'))
+        self.assertEqual(response.content, b'')
+
+    def test_unknown_file_goes_to_views(self):
+        response = self.client.get('/static/css/missing.css')
+        self.assertEqual(response.status_code, 404)
+
+
+class UncollectedStaticTests(SimpleTestCase):
+    @override_settings(STATIC_ROOT=os.path.join(STATIC_ROOT, 'missing'))
+    def test_static_falls_back_to_plain_name(self):
+        """Без collectstatic {% static %} дает исходное имя файла."""
+        self.assertEqual(static(CSS), '/static/' + CSS)
@@ -0,0 +1,133 @@
+import importlib
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command, CommandError
+from django.db import OperationalError
+from django.test import (override_settings, SimpleTestCase, TestCase,
+                         TransactionTestCase)
+from django.utils import timezone
+
+from yatube import wsgi
+
+from ..models import Task
+from ..tasks import (claim, run_pending, start_configured_workers, task,
+                     TASKS, Worker)
+
+calls = []
+
+
+@task()
+def remember(value):
+    calls.append(value)
+
+
+@task(max_attempts=2, retry_delay=60)
+def explode():
+    raise RuntimeError('сбой')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_task_runs_once_and_is_removed(self):
+        remember.enqueue('значение')
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ['значение'])
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(run_pending(), 0)
+
+    def test_failed_task_is_retried_with_backoff_then_kept(self):
+        job = explode.enqueue()
+        failed = TASKS.value(task=explode.task_name, result='failed')
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.PENDING, 1))
+        self.assertIn('сбой', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=50))
+        # До срока повтора задачу никто не берет
+        self.assertEqual(run_pending(), 0)
+
+        Task.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.FAILED, 2))
+        self.assertEqual(TASKS.value(task=explode.task_name,
+                                     result='failed'), failed + 1)
+
+    @override_settings(TASK_LOCK_TIMEOUT=60)
+    def test_abandoned_task_is_claimed_again(self):
+        job = remember.enqueue(1)
+        self.assertEqual(claim('первый', 10), [job])
+        self.assertEqual(claim('второй', 10), [])
+        Task.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual([job.locked_by for job in claim('второй', 10)],
+                         ['второй'])
+
+
+class WorkerErrorTests(SimpleTestCase):
+    @mock.patch('core.tasks.connections')
+    def test_worker_survives_database_errors(self, connections):
+        """Сбой базы не завершает поток исполнителя."""
+        worker = Worker('тест', poll_interval=0)
+
+        def claim(name, limit):
+            if claim.calls == 0:
+                claim.calls += 1
+                raise OperationalError('database is locked')
+            worker.stop()
+            return []
+        claim.calls = 0
+
+        with mock.patch('core.tasks.claim', claim), \
+                self.assertLogs('core.tasks', 'ERROR'):
+            worker.run()
+        self.assertTrue(connections.close_all.called)
+        with mock.patch('core.tasks.claim', side_effect=OperationalError):
+            with self.assertRaises(OperationalError):
+                Worker('тест').run(burst=True)
+
+
+class WorkerStartupTests(SimpleTestCase):
+    @mock.patch('core.tasks.start_workers')
+    def test_workers_start_with_process(self, start_workers):
+        """Исполнители запускаются при старте, а не с первой новой
+        задачей: отложенные с прошлого запуска задачи не ждут."""
+        with override_settings(TASK_WORKER_THREADS=0):
+            start_configured_workers()
+        start_workers.assert_not_called()
+        with override_settings(TASK_WORKER_THREADS=3):
+            importlib.reload(wsgi)
+        start_workers.assert_called_once_with(3)
+
+
+# Задачи из этих тестов выполняет только команда
+@override_settings(TASK_WORKER_THREADS=0, CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': 'test_cache',
+}})
+class RunWorkersCommandTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+        call_command('createcachetable', verbosity=0)
+
+    def test_requires_shared_cache(self):
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            with self.assertRaisesMessage(CommandError, 'LocMemCache'):
+                call_command('run_workers', '--burst', stdout=StringIO())
+
+    def test_burst_runs_queued_tasks_in_threads(self):
+        """Исполнители в потоках видят задачи, записанные в другой
+        транзакции."""
+        remember.enqueue(1)
+        remember.enqueue(2)
+        call_command('run_workers', '--threads=1', '--burst',
+                     stdout=StringIO())
+        self.assertEqual(sorted(calls), [1, 2])
@@ -1,4 +1,11 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+
+from . import metrics as app_metrics
+from .client_ip import client_ip
 
 
 def page_not_found(request, exception):
@@ -15,3 +22,24 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return False
+    allowed = settings.METRICS_ALLOWED_IPS
+    return not allowed or client_ip(request) in allowed
+
+
+@never_cache
+def metrics(request):
+    """Метрики процесса для Prometheus; доступны только с METRICS_ALLOWED_IPS
+    (пустой список - с любого адреса) и, если задан METRICS_TOKEN, только
+    с заголовком Authorization: Bearer <токен>."""
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(app_metrics.expose(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
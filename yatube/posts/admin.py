@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search_index
 from .models import Group, Post
 
 
@@ -16,6 +17,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date', 'author')
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идет через индекс, а не LIKE '%...%' по всем постам
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(
+            pk__in=search_index.matching_post_ids(search_term)
+        ), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
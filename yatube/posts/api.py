@@ -0,0 +1,160 @@
+"""JSON API лент и страницы поста только для чтения.
+
+Посты сериализуются прямо из строк values(): без экземпляров моделей и
+без шаблонов. Параметр ?fields=id,text,... выбирает поля ответа, и в
+запрос попадают только нужные столбцы и JOIN. Ленты листаются курсором
+(?cursor=), как HTML-ленты в курсорном режиме; ?limit= - размер
+страницы, не больше API_MAX_LIMIT.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.urls import reverse
+
+from core.query_budget import query_budget
+
+from . import feed_cache
+from .conditional import feed_condition
+from .models import Group, Post
+from .pagination import CursorPaginator, InvalidCursor
+from .views import post_detail_scopes
+
+User = get_user_model()
+
+
+def full_name(row):
+    return f'{row["author__first_name"]} {row["author__last_name"]}'.strip()
+
+
+def image_url(row):
+    return default_storage.url(row['image']) if row['image'] else None
+
+
+def post_url(row):
+    return reverse('posts:post_detail', kwargs={'post_id': row['pk']})
+
+
+# Поле ответа: (столбцы values(), значение из строки)
+FIELDS = {
+    'id': (('pk',), lambda row: row['pk']),
+    'text': (('text',), lambda row: row['text']),
+    'pub_date': (('pub_date',), lambda row: row['pub_date'].isoformat()),
+    'author': (('author__username',), lambda row: row['author__username']),
+    'author_name': (('author__first_name', 'author__last_name'), full_name),
+    'group': (('group__slug',), lambda row: row['group__slug']),
+    'image': (('image',), image_url),
+    'url': (('pk',), post_url),
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def selected_fields(request):
+    value = request.GET.get('fields')
+    if not value:
+        return list(FIELDS)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown or not fields:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def serializer(fields):
+    """Столбцы для values() и функция строка -> словарь ответа."""
+    # pk и pub_date нужны курсору в любом случае
+    columns = {'pk', 'pub_date'}
+    for name in fields:
+        columns.update(FIELDS[name][0])
+    getters = [(name, FIELDS[name][1]) for name in fields]
+
+    def serialize(row):
+        return {name: getter(row) for name, getter in getters}
+    return sorted(columns), serialize
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def parse_limit(value):
+    if value is None:
+        return settings.PAGE_LIMIT
+    try:
+        # int() принимает не все, что str.isdigit() считает цифрами ('²')
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.API_MAX_LIMIT:
+        raise BadRequest(f'limit должен быть от 1 до {settings.API_MAX_LIMIT}')
+    return limit
+
+
+def feed_response(request, posts):
+    try:
+        fields = selected_fields(request)
+        limit = parse_limit(request.GET.get('limit'))
+        columns, serialize = serializer(fields)
+        paginator = CursorPaginator(posts.values(*columns), limit)
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return error('Неверный курсор')
+    except BadRequest as exception:
+        return error(str(exception))
+    return JsonResponse({
+        'results': [serialize(row) for row in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+@query_budget(3)
+@feed_condition(lambda: {feed_cache.INDEX})
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+@query_budget(4)
+@feed_condition(lambda slug: {feed_cache.group_scope(slug)})
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return error('Группа не найдена', status=404)
+    return feed_response(request, Post.objects.filter(group_id=group_id))
+
+
+@query_budget(4)
+@feed_condition(lambda username: {feed_cache.profile_scope(username)})
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return error('Автор не найден', status=404)
+    return feed_response(request, Post.objects.filter(author_id=author_id))
+
+
+@query_budget(4)
+@feed_condition(post_detail_scopes)
+def post_detail(request, post_id):
+    try:
+        columns, serialize = serializer(selected_fields(request))
+    except BadRequest as exception:
+        return error(str(exception))
+    row = Post.objects.filter(pk=post_id).values(*columns).first()
+    if row is None:
+        return error('Пост не найден', status=404)
+    return JsonResponse(serialize(row))
@@ -0,0 +1,187 @@
+"""Замеры представлений лент на больших данных (команда benchmark_views).
+
+Для каждого представления и глубины страницы замеряются время ответа
+(перцентили), число SQL-запросов и пиковая память Python (tracemalloc,
+отдельным прогоном, чтобы трассировка не искажала время).
+"""
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from core.query_budget import count_queries
+
+from .models import AuthorStats, Group, Post
+from .pagination import NEXT, encode_cursor
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_detail')
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, percent):
+    """Перцентиль с линейной интерполяцией между соседними значениями."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (
+        position - lower
+    )
+
+
+def feed_cases(view, url, queryset, total, depths):
+    """Страницы ленты на глубинах depths: по номеру и по курсору."""
+    cases = []
+    pages = max(math.ceil(total / settings.PAGE_LIMIT), 1)
+    for depth in depths:
+        if depth > pages:
+            continue
+        cases.append((view, f'page={depth}', url, {'page': depth}))
+        if depth == 1:
+            continue
+        # Курсор указывает на последний пост предыдущей страницы
+        last = queryset.order_by('-pub_date', '-pk').values_list(
+            'pub_date', 'pk'
+        )[(depth - 1) * settings.PAGE_LIMIT - 1]
+        cases.append((view, f'cursor@{depth}', url,
+                      {'cursor': encode_cursor(NEXT, *last)}))
+    return cases
+
+
+def build_cases(depths, views=VIEWS):
+    """Список (представление, случай, url, параметры) для замера.
+
+    Для группы и профиля берутся самые большие группа и автор.
+    """
+    cases = []
+    if 'index' in views:
+        cases += feed_cases('index', reverse('posts:index'), Post.objects,
+                            Post.objects.count(), depths)
+    group = Group.objects.order_by('-posts_count').first()
+    if 'group_posts' in views and group:
+        cases += feed_cases(
+            'group_posts',
+            reverse('posts:group_list', kwargs={'slug': group.slug}),
+            group.posts, group.posts_count, depths,
+        )
+    stats = AuthorStats.objects.select_related('author').order_by(
+        '-posts_count'
+    ).first()
+    if 'profile' in views and stats:
+        cases += feed_cases(
+            'profile',
+            reverse('posts:profile',
+                    kwargs={'username': stats.author.username}),
+            stats.author.posts, stats.posts_count, depths,
+        )
+    if 'post_detail' in views:
+        for label, post in (('newest', Post.objects.first()),
+                            ('oldest', Post.objects.last())):
+            if post is not None:
+                cases.append(('post_detail', label, reverse(
+                    'posts:post_detail', kwargs={'post_id': post.pk}
+                ), {}))
+    return cases
+
+
+def measure(client, path, params, repeats, warmup=1, cold=True):
+    """Замеряет один случай; cold=True сбрасывает кэш перед запросом."""
+    def get():
+        if cold:
+            cache.clear()
+        response = client.get(path, params)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} {params}: {response.status_code}')
+
+    for _ in range(warmup):
+        get()
+    timings = []
+    queries = []
+    for _ in range(repeats):
+        with count_queries() as counter:
+            started = time.perf_counter()
+            get()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+
+    tracemalloc.start()
+    try:
+        get()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latency = {f'p{percent}': round(percentile(timings, percent), 3)
+               for percent in PERCENTILES}
+    latency.update(min=round(min(timings), 3),
+                   max=round(max(timings), 3),
+                   mean=round(sum(timings) / len(timings), 3))
+    return {
+        'latency_ms': latency,
+        'queries': max(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(depths, repeats, warmup=1, cold=True, views=VIEWS):
+    """Прогоняет все случаи и возвращает отчет для сохранения в JSON."""
+    client = Client()
+    results = []
+    for view, case, path, params in build_cases(depths, views):
+        result = measure(client, path, params, repeats, warmup, cold)
+        results.append({'view': view, 'case': case, 'path': path,
+                        'params': params, **result})
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': {
+                'posts': Post.objects.count(),
+                'groups': Group.objects.count(),
+                'authors': AuthorStats.objects.count(),
+            },
+            'repeats': repeats,
+            'cache': 'cold' if cold else 'warm',
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current):
+    """Строки (представление, случай, метрика, было, стало) для общих
+    случаев двух отчетов."""
+    previous = {(row['view'], row['case']): row
+                for row in baseline['results']}
+    rows = []
+    for row in current['results']:
+        old = previous.get((row['view'], row['case']))
+        if old is None:
+            continue
+        for metric in ('p50', 'p95'):
+            rows.append((row['view'], row['case'], metric,
+                         old['latency_ms'][metric],
+                         row['latency_ms'][metric]))
+        rows.append((row['view'], row['case'], 'queries',
+                     old['queries'], row['queries']))
+    return rows
@@ -0,0 +1,44 @@
+"""Массовая загрузка постов в обход сигналов.
+
+bulk_create не вызывает сигналы Post, поэтому после загрузки счетчики,
+поисковый индекс и версии лент нужно обновить вызовом finish_bulk_load().
+"""
+from contextlib import contextmanager
+
+from django.db import connection
+
+from . import feed_cache, search_index
+from .counters import rebuild_post_counters
+from .models import Post
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add у Post.pub_date: bulk_create сохранит даты
+    загружаемых постов, а не текущее время."""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def analyze():
+    """Обновляет статистику планировщика (ее читает и estimate_count)."""
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def finish_bulk_load(index=True, scopes=(feed_cache.INDEX,)):
+    """Приводит производные данные в соответствие с загруженными постами.
+
+    scopes - ленты, в которые попали посты; новым авторам и группам
+    отмечать ничего не нужно, версий их лент еще нет.
+    """
+    authors, groups = rebuild_post_counters()
+    indexed = search_index.rebuild_index() if index else None
+    feed_cache.touch(*scopes)
+    analyze()
+    return {'authors': authors, 'groups': groups, 'indexed': indexed}
@@ -0,0 +1,43 @@
+"""Кэш карточек постов, общих для всех лент.
+
+Карточка (includes/post_card.html) не зависит от пользователя, поэтому
+рендерится без контекста запроса и кэшируется по посту. Ключ включает
+метку изменения поста Post.updated и выводимые поля автора и группы:
+правка поста (post_edit, админка), смена имени автора или slug группы
+дают новый ключ, а старая карточка вытесняется по таймауту.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def card_key(post, show_group=True):
+    group_slug = post.group.slug if post.group_id else ''
+    stamp = (f'{post.pk}:{post.updated.isoformat()}:{post.author.username}:'
+             f'{post.author.get_full_name()}:{group_slug}:{show_group:d}')
+    return f'post-card:{post.pk}:{hashlib.md5(stamp.encode()).hexdigest()}'
+
+
+def render_cards(posts, show_group=True):
+    """HTML карточек постов в том же порядке; недостающие в кэше
+    рендерятся и сохраняются одним set_many."""
+    posts = list(posts)
+    keys = [card_key(post, show_group) for post in posts]
+    cached = cache.get_many(keys)
+    missing = {}
+    template = get_template(CARD_TEMPLATE)
+    cards = []
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = missing[key] = template.render(
+                {'post': post, 'show_group': show_group}
+            )
+        cards.append(html)
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
@@ -0,0 +1,86 @@
+"""Условные GET-запросы (ETag / Last-Modified) для лент и страницы поста.
+
+Валидатор страницы строится из версий лент feed_cache: их обновляют
+сигналы при любом изменении, которое видно на странице. Поэтому проверка
+If-None-Match не трогает базу, и при совпадении представление не
+выполняется вовсе - клиент получает 304 Not Modified.
+
+Версия обновляется сразу после записи в основную базу, а реплика
+догоняет ее позже. Поэтому такие страницы читают только основную базу:
+иначе отстающая страница с реплики ушла бы в кэш и клиентам под новым
+ETag, и 304 подтверждали бы ее до следующей правки.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from core.db_router import use_primary
+
+from . import feed_cache
+
+
+def page_validators(request, scopes):
+    """ETag и Last-Modified страницы, собранной из лент scopes.
+
+    Разметка зависит от пользователя, поэтому он входит в ETag. Для
+    авторизованных Last-Modified не отдается: время не меняется при входе
+    и выходе, и по одному If-Modified-Since нельзя отличить их страницы.
+    """
+    versions = [feed_cache.get_version(scope) for scope in sorted(scopes)]
+    user = request.user
+    owner = user.pk if user.is_authenticated else 'anonymous'
+    etag = quote_etag(hashlib.md5(
+        f'{owner}:{versions}'.encode()
+    ).hexdigest())
+    if user.is_authenticated:
+        return etag, None
+    # Версия - время изменения в наносекундах
+    last_modified = datetime.fromtimestamp(max(versions) // 10 ** 9,
+                                           tz=timezone.utc)
+    return etag, int(last_modified.timestamp())
+
+
+def feed_condition(get_scopes):
+    """Отвечает 304 на GET, если ленты get_scopes(**kwargs) не менялись.
+
+    get_scopes получает аргументы представления и возвращает набор лент
+    или None, если страницы нет (тогда ответ строит само представление).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            with use_primary():
+                return conditional(request, *args, **kwargs)
+
+        def conditional(request, *args, **kwargs):
+            scopes = get_scopes(*args, **kwargs)
+            if not scopes:
+                return view_func(request, *args, **kwargs)
+            etag, last_modified = page_validators(request, scopes)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                return response
+            response.setdefault('ETag', etag)
+            if last_modified is not None:
+                response.setdefault('Last-Modified', http_date(last_modified))
+            # Страницу можно хранить, но каждый раз сверять с сервером;
+            # авторизованным - только в кэше браузера
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, max_age=0,
+                                    must_revalidate=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return inner
+    return decorator
@@ -0,0 +1,130 @@
+"""Денормализованные счетчики постов и подписчиков авторов и постов групп.
+
+Счетчики меняются в сигналах Post и Follow (см. signals.py) внутри
+транзакции сохранения или удаления поста или подписки.
+rebuild_post_counters() пересчитывает их целиком, например после
+массового импорта в обход save().
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Follow, Group, Post
+
+
+def shift_author_count(author_id, delta):
+    updated = AuthorStats.objects.filter(
+        author_id=author_id, posts_count__gte=-delta
+    ).update(posts_count=F('posts_count') + delta)
+    if not updated and delta > 0:
+        # Первый пост автора (или счетчик разошелся) - считаем по факту.
+        # При удалении строку не создаем: автор может удаляться каскадом.
+        AuthorStats.objects.update_or_create(
+            author_id=author_id,
+            defaults={'posts_count': Post.objects.filter(
+                author_id=author_id).count()},
+        )
+
+
+def shift_follower_count(author_id, delta):
+    updated = AuthorStats.objects.filter(
+        author_id=author_id, followers_count__gte=-delta
+    ).update(followers_count=F('followers_count') + delta)
+    if not updated and delta > 0:
+        AuthorStats.objects.update_or_create(
+            author_id=author_id,
+            defaults={'followers_count': Follow.objects.filter(
+                author_id=author_id).count()},
+        )
+
+
+def shift_group_count(group_id, delta):
+    if group_id is None:
+        return
+    updated = Group.objects.filter(
+        pk=group_id, posts_count__gte=-delta
+    ).update(posts_count=F('posts_count') + delta)
+    if not updated:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=Post.objects.filter(group_id=group_id).count()
+        )
+
+
+def add_post_counts(author_counts, group_counts, chunk_size=500):
+    """Прибавляет к счетчикам числа только что вставленных постов
+    ({id: число}) - по UPDATE на каждую различную прибавку, а не на
+    каждого автора, как shift_author_count()."""
+    author_counts = dict(author_counts)
+    ids = list(author_counts)
+    existing = set()
+    for start in range(0, len(ids), chunk_size):
+        existing.update(AuthorStats.objects.filter(
+            author_id__in=ids[start:start + chunk_size]
+        ).values_list('author_id', flat=True))
+    missing = [pk for pk in ids if pk not in existing]
+    if missing:
+        # Новые посты уже в базе, поэтому считаем по факту
+        AuthorStats.objects.bulk_create(
+            AuthorStats(author_id=row['author'], posts_count=row['total'])
+            for row in Post.objects.filter(author_id__in=missing).order_by(
+            ).values('author').annotate(total=Count('pk'))
+        )
+    for pk in missing:
+        del author_counts[pk]
+    group_counts = {pk: count for pk, count in group_counts.items()
+                    if pk is not None}
+    for queryset, field, counts in (
+        (AuthorStats.objects, 'author_id', author_counts),
+        (Group.objects, 'pk', group_counts),
+    ):
+        by_delta = {}
+        for pk, delta in counts.items():
+            by_delta.setdefault(delta, []).append(pk)
+        for delta, pks in by_delta.items():
+            for start in range(0, len(pks), chunk_size):
+                queryset.filter(**{
+                    f'{field}__in': pks[start:start + chunk_size]
+                }).update(posts_count=F('posts_count') + delta)
+
+
+def author_followers_count(author):
+    try:
+        return author.stats.followers_count
+    except AuthorStats.DoesNotExist:
+        return 0
+
+
+def author_posts_count(author):
+    """Число постов автора из счетчика, без COUNT(*) по постам."""
+    try:
+        return author.stats.posts_count
+    except AuthorStats.DoesNotExist:
+        return 0
+
+
+def rebuild_post_counters():
+    """Пересчитывает все счетчики, возвращает (авторов, групп)."""
+    group_counts = Post.objects.filter(group=OuterRef('pk')).order_by(
+    ).values('group').annotate(total=Count('pk')).values('total')
+    groups = Group.objects.update(
+        posts_count=Coalesce(Subquery(group_counts), 0)
+    )
+    AuthorStats.objects.all().delete()
+    author_counts = Post.objects.order_by().values('author').annotate(
+        total=Count('pk')
+    )
+    follower_counts = dict(Follow.objects.order_by().values(
+        'author'
+    ).annotate(total=Count('pk')).values_list('author', 'total'))
+    stats = AuthorStats.objects.bulk_create(
+        (AuthorStats(author_id=row['author'], posts_count=row['total'],
+                     followers_count=follower_counts.pop(row['author'], 0))
+         for row in author_counts.iterator()),
+        batch_size=500,
+    )
+    # Авторы без постов, но с подписчиками
+    stats += AuthorStats.objects.bulk_create(
+        (AuthorStats(author_id=author_id, followers_count=total)
+         for author_id, total in follower_counts.items()),
+        batch_size=500,
+    )
+    return len(stats), groups
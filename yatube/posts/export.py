@@ -0,0 +1,95 @@
+"""Потоковая выгрузка постов в NDJSON и CSV.
+
+Посты читаются кусками по chunk_size с продолжением по ключу
+(pub_date, id), от старых к новым: каждый кусок - отдельный короткий
+запрос по индексу ленты, поэтому память не зависит от размера выгрузки,
+а базу не держит открытый курсор. Поля совпадают с входным форматом
+import_posts, выгрузку можно загрузить обратно.
+"""
+import csv
+import json
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Post
+from .pagination import before
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+FIELDS = ('id', 'text', 'author', 'group', 'pub_date', 'image')
+CHUNK_SIZE = 1000
+
+
+def parse_moment(value):
+    """Дата или дата-время ISO 8601; дата без времени - ее полночь."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Неверная дата: {value}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filtered_posts(group=None, author=None, since=None, until=None):
+    """Посты группы и (или) автора с since <= pub_date < until."""
+    posts = Post.objects.all()
+    if group is not None:
+        posts = posts.filter(group=group)
+    if author is not None:
+        posts = posts.filter(author=author)
+    if since is not None:
+        posts = posts.filter(pub_date__gte=since)
+    if until is not None:
+        posts = posts.filter(pub_date__lt=until)
+    return posts
+
+
+def iter_rows(posts, chunk_size=CHUNK_SIZE):
+    """Словари постов от старых к новым, кусками по chunk_size."""
+    rows = posts.order_by('pub_date', 'pk').values_list(
+        'pk', 'text', 'author__username', 'group__slug', 'pub_date', 'image'
+    )
+    chunk = list(rows[:chunk_size])
+    while chunk:
+        for pk, text, author, group, pub_date, image in chunk:
+            yield {'id': pk, 'text': text, 'author': author, 'group': group,
+                   'pub_date': pub_date.isoformat(), 'image': image}
+        if len(chunk) < chunk_size:
+            return
+        last_pk, last_date = chunk[-1][0], chunk[-1][4]
+        chunk = list(rows.filter(before(last_date, last_pk))[:chunk_size])
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Line:
+    """Файл для csv.writer, который просто возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([
+            '' if row[field] is None else row[field] for field in FIELDS
+        ])
+
+
+RENDERERS = {'ndjson': render_ndjson, 'csv': render_csv}
+
+
+def render(file_format, rows):
+    return RENDERERS[file_format](rows)
@@ -0,0 +1,136 @@
+"""Кэш отрендеренных лент постов.
+
+У каждой ленты (scope) есть версия - время последнего изменения в нано-
+секундах. Ключ фрагмента включает версию, поэтому для инвалидации
+достаточно обновить версию: старые фрагменты просто перестают читаться
+и вытесняются по таймауту. Версии обновляют сигналы в signals.py.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import metrics
+from core.db_router import use_primary
+
+from .models import Group
+
+INDEX = 'index'
+
+HITS_KEY = 'feed-cache:hits'
+MISSES_KEY = 'feed-cache:misses'
+
+LOOKUPS = metrics.Counter(
+    'yatube_feed_cache_lookups_total', 'Обращения к кэшу лент',
+    ('result',),
+)
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def profile_scope(username):
+    return f'profile:{username}'
+
+
+def post_scopes(post, group_ids=None):
+    """Ленты, в которых выводится пост (group_ids - его прежние группы)."""
+    group_ids = {post.group_id} if group_ids is None else group_ids
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    return {INDEX,
+            profile_scope(post.author.username),
+            *(group_scope(slug) for slug in slugs)}
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _version_key(scope):
+    return f'feed-version:{_digest(scope)}'
+
+
+def get_version(scope):
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Версия вытеснена или еще не создана: считаем ленту измененной
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def touch(*scopes):
+    """Отмечает ленты измененными.
+
+    Версия обновляется сразу и еще раз после коммита транзакции: иначе
+    страница, отрендеренная до коммита по старым данным, осталась бы
+    в кэше под новой версией.
+    """
+    def bump():
+        now = time.time_ns()
+        cache.set_many({_version_key(scope): now for scope in scopes}, None)
+
+    if scopes:
+        bump()
+        transaction.on_commit(bump)
+
+
+def fragment_key(scope, position):
+    """Ключ фрагмента ленты scope на странице position."""
+    version = get_version(scope)
+    return f'feed:{_digest(f"{scope}:{version}:{position}")}'
+
+
+def count_key(scope):
+    """Ключ закэшированного числа постов ленты; сбрасывается с версией."""
+    return f'feed-count:{_digest(f"{scope}:{get_version(scope)}")}'
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_or_render(key, render):
+    """HTML из кэша или render(); рендер для кэша читает основную базу,
+    чтобы под новой версией не сохранилась страница с отстающей реплики."""
+    html = cache.get(key)
+    if html is not None:
+        _count(HITS_KEY)
+        return html
+    _count(MISSES_KEY)
+    with use_primary():
+        html = render()
+    cache.set(key, html, settings.FEED_CACHE_TIMEOUT)
+    return html
+
+
+def stats():
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+@metrics.collector
+def collect_stats():
+    values = stats()
+    LOOKUPS.set_total(values['hits'], result='hit')
+    LOOKUPS.set_total(values['misses'], result='miss')
@@ -0,0 +1,136 @@
+"""RSS и Atom ленты постов: общая, группы и автора.
+
+Отрендеренный фид хранится в кэше под версией своей ленты из feed_cache,
+поэтому сохранение или удаление поста (сигналы Post) сразу его
+сбрасывает, а условные GET читателей отвечаются по той же версии без
+обращения к базе (conditional.feed_condition).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import linebreaksbr, truncatechars
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from . import feed_cache
+from .conditional import feed_condition
+from .models import Group, Post
+
+User = get_user_model()
+
+
+class PostsFeed(Feed):
+    """Последние посты ленты; подклассы задают get_object и posts()."""
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).for_feed()[:settings.SYNDICATION_LIMIT]
+
+    def item_title(self, item):
+        return truncatechars(item.text, 50)
+
+    def item_description(self, item):
+        return linebreaksbr(item.text)
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class LatestPostsFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def posts(self, group):
+        return group.posts.all()
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def posts(self, author):
+        return author.posts.all()
+
+    def title(self, author):
+        return f'Yatube: записи {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Новые записи пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+
+def atom(feed_class):
+    """Тот же фид в формате Atom."""
+    return type(f'Atom{feed_class.__name__}', (feed_class,), {
+        'feed_type': Atom1Feed,
+        'subtitle': feed_class.description,
+    })
+
+
+def cached_feed(feed, get_scope):
+    """View фида с кэшем по версии ленты get_scope(**kwargs)."""
+    @feed_condition(lambda **kwargs: {get_scope(**kwargs)})
+    def view(request, **kwargs):
+        # Ссылки в фиде абсолютные, поэтому хост входит в ключ
+        key = feed_cache.fragment_key(
+            get_scope(**kwargs),
+            f'syndication:{request.get_host()}{request.path}',
+        )
+
+        def render():
+            response = feed(request, **kwargs)
+            return response.content, response['Content-Type']
+
+        content, content_type = feed_cache.get_or_render(key, render)
+        return HttpResponse(content, content_type=content_type)
+    return view
+
+
+def index_scope():
+    return feed_cache.INDEX
+
+
+FEEDS = {
+    'index': (LatestPostsFeed, index_scope),
+    'group': (GroupPostsFeed, feed_cache.group_scope),
+    'profile': (AuthorPostsFeed, feed_cache.profile_scope),
+}
+
+
+def feed_view(name, feed_format):
+    feed_class, get_scope = FEEDS[name]
+    if feed_format == 'atom':
+        feed_class = atom(feed_class)
+    return cached_feed(feed_class(), get_scope)
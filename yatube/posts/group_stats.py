@@ -0,0 +1,141 @@
+"""Статистика групп для каталога: число постов, время последнего поста
+и самые активные авторы.
+
+Статистика страницы групп, которой нет в кэше, считается одним
+агрегирующим запросом по постам с группировкой по (группа, автор).
+В кэше у группы хранится до GROUP_STATS_TRACKED_AUTHORS самых активных
+авторов и верхняя граница числа постов остальных, поэтому новый пост
+обновляет запись на месте (post_added), а пересчет нужен, только когда
+неотслеживаемый автор может войти в выводимые. Удаление поста, перенос
+в другую группу и переименование автора сбрасывают запись (forget).
+Одновременные посты в одну группу могут потерять прибавку, поэтому
+записи живут не дольше GROUP_STATS_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from core.db_router import use_primary
+
+from .models import Post
+
+
+def stats_key(group_id):
+    return f'group-stats:{group_id}'
+
+
+def empty_stats():
+    # floor - сколько постов самое большее у неотслеживаемого автора
+    return {'posts': 0, 'latest': None, 'authors': [], 'floor': 0}
+
+
+def compute_stats(group_ids):
+    """Статистика групп group_ids одним запросом: {id группы: stats}."""
+    rows = Post.objects.filter(group_id__in=group_ids).order_by().values(
+        'group', 'author__username'
+    ).annotate(posts=Count('pk'), latest=Max('pub_date'))
+    stats = {group_id: empty_stats() for group_id in group_ids}
+    for row in rows:
+        entry = stats[row['group']]
+        entry['posts'] += row['posts']
+        if entry['latest'] is None or row['latest'] > entry['latest']:
+            entry['latest'] = row['latest']
+        entry['authors'].append([row['author__username'], row['posts']])
+    limit = settings.GROUP_STATS_TRACKED_AUTHORS
+    for entry in stats.values():
+        entry['authors'].sort(key=lambda author: (-author[1], author[0]))
+        if len(entry['authors']) > limit:
+            entry['floor'] = entry['authors'][limit][1]
+            del entry['authors'][limit:]
+    return stats
+
+
+def top_authors(entry):
+    return [username for username, _ in
+            entry['authors'][:settings.GROUP_TOP_AUTHORS]]
+
+
+def get_stats(group_ids):
+    """Статистика групп из кэша; недостающие считаются и кэшируются."""
+    keys = {group_id: stats_key(group_id) for group_id in group_ids}
+    cached = cache.get_many(keys.values())
+    stats = {group_id: cached[key] for group_id, key in keys.items()
+             if key in cached}
+    missing = [group_id for group_id in group_ids if group_id not in stats]
+    if missing:
+        # Кэшируется до следующей правки: реплика могла еще не догнать ее
+        with use_primary():
+            computed = compute_stats(missing)
+        cache.set_many({keys[group_id]: entry
+                        for group_id, entry in computed.items()},
+                       settings.GROUP_STATS_CACHE_TIMEOUT)
+        stats.update(computed)
+    for entry in stats.values():
+        entry['top_authors'] = top_authors(entry)
+    return stats
+
+
+def add_post(entry, username, pub_date):
+    """Учитывает новый пост в записи; False - запись стала неточной."""
+    entry['posts'] += 1
+    if entry['latest'] is None or pub_date > entry['latest']:
+        entry['latest'] = pub_date
+    authors = entry['authors']
+    for author in authors:
+        if author[0] == username:
+            author[1] += 1
+            break
+    else:
+        if entry['floor']:
+            # Автор не отслеживается, и его число постов известно только
+            # сверху. Если он может попасть в выводимые, нужен пересчет.
+            entry['floor'] += 1
+            return is_exact(entry)
+        authors.append([username, 1])
+    authors.sort(key=lambda author: (-author[1], author[0]))
+    limit = settings.GROUP_STATS_TRACKED_AUTHORS
+    if len(authors) > limit:
+        entry['floor'] = max(entry['floor'], authors[limit][1])
+        del authors[limit:]
+    return is_exact(entry)
+
+
+def is_exact(entry):
+    """Выводимые авторы точны, если никто из неотслеживаемых не может
+    их догнать."""
+    if not entry['floor']:
+        return True
+    shown = entry['authors'][:settings.GROUP_TOP_AUTHORS]
+    return (len(shown) == settings.GROUP_TOP_AUTHORS
+            and shown[-1][1] > entry['floor'])
+
+
+def post_added(post):
+    """Обновляет запись группы нового поста после коммита."""
+    if post.group_id is None:
+        return
+    group_id = post.group_id
+    username = post.author.username
+    pub_date = post.pub_date
+
+    def update():
+        key = stats_key(group_id)
+        entry = cache.get(key)
+        if entry is None:
+            return
+        if add_post(entry, username, pub_date):
+            cache.set(key, entry, settings.GROUP_STATS_CACHE_TIMEOUT)
+        else:
+            cache.delete(key)
+
+    transaction.on_commit(update)
+
+
+def forget(*group_ids):
+    """Сбрасывает записи групп сейчас и после коммита транзакции."""
+    keys = [stats_key(group_id) for group_id in group_ids
+            if group_id is not None]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,106 @@
+"""Обработка загруженных картинок постов.
+
+Файл проверяется до декодирования: размер в байтах, формат и разрешение
+из заголовка (validate_image_upload). Перед сохранением картинка
+уменьшается до IMAGE_MAX_SIZE, теряет метаданные (EXIF, GPS, профили
+камер) и пережимается (optimize_image). JPEG декодируется сразу в
+уменьшенном масштабе (draft), а результат пишется во временный файл,
+который уходит на диск, если не умещается в FILE_UPLOAD_MAX_MEMORY_SIZE:
+пиковая память на загрузку ограничена размером уменьшенной картинки.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import models
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+
+
+def read_header(file):
+    """Формат и размер картинки из заголовка, без декодирования."""
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            return image.format, image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Загрузите картинку: файл поврежден '
+                              'или это не изображение.', code='invalid_image')
+    finally:
+        file.seek(position)
+
+
+def validate_image_upload(file):
+    if getattr(file, '_committed', True):
+        # Уже сохраненный файл проверен при загрузке
+        return
+    if file.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            'Картинка больше %(limit)s.',
+            params={'limit': filesizeformat(settings.IMAGE_UPLOAD_MAX_BYTES)},
+            code='file_too_large',
+        )
+    image_format, (width, height) = read_header(file)
+    if image_format not in settings.IMAGE_UPLOAD_FORMATS:
+        raise ValidationError(
+            'Поддерживаются картинки %(formats)s.',
+            params={'formats': ', '.join(settings.IMAGE_UPLOAD_FORMATS)},
+            code='invalid_format',
+        )
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение: %(width)s×%(height)s.',
+            params={'width': width, 'height': height},
+            code='too_many_pixels',
+        )
+
+
+def optimize_image(file):
+    """Уменьшенная картинка без метаданных: (формат, временный файл)."""
+    max_size = settings.IMAGE_MAX_SIZE
+    file.seek(0)
+    with Image.open(file) as image:
+        image_format = image.format
+        if image_format == 'JPEG':
+            # Декодер JPEG сразу уменьшает в 2, 4 или 8 раз
+            image.draft('RGB', max_size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(max_size, Image.LANCZOS, reducing_gap=3.0)
+        options = {'optimize': True}
+        if image_format == 'JPEG':
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            options.update(quality=settings.IMAGE_JPEG_QUALITY,
+                           progressive=True)
+        elif image_format == 'WEBP':
+            options = {'quality': settings.IMAGE_JPEG_QUALITY, 'method': 6}
+        output = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+            dir=settings.FILE_UPLOAD_TEMP_DIR,
+        )
+        # Метаданные не копируются: exif, icc_profile и comment не переданы
+        image.save(output, image_format, **options)
+    output.seek(0)
+    return image_format, output
+
+
+class PostImageField(models.ImageField):
+    """ImageField, который проверяет загрузку и сохраняет обработанную
+    картинку вместо оригинала."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('validators', [validate_image_upload])
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        file = getattr(model_instance, self.attname)
+        if file and not file._committed:
+            image_format, output = optimize_image(file.file)
+            name = os.path.splitext(file.name)[0] + EXTENSIONS[image_format]
+            file.file = File(output, name=name)
+            file.name = name
+        return super().pre_save(model_instance, add)
@@ -0,0 +1,292 @@
+"""Потоковая загрузка постов из JSONL и CSV (команда import_posts).
+
+Файл читается по записи, посты вставляются пачками bulk_create. Каждая
+пачка - одна транзакция: посты, новые авторы и группы, поисковый индекс,
+счетчики и ImportCheckpoint со смещением в файле после последней записи.
+Поэтому прерванную загрузку можно продолжить с того же места, а память
+не растет с размером файла: в ней только пачка и словари
+username -> id и slug -> id.
+
+Поля записи: text, author (username), group (slug, необязательно),
+pub_date (ISO 8601, необязательно - тогда текущее время).
+"""
+import csv
+import json
+import os
+import time
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed_cache, group_stats, search_index
+from .bulk import analyze, keep_pub_date
+from .models import Group, ImportCheckpoint, Post
+
+User = get_user_model()
+
+# Не больше параметров в одном IN (...), чем позволяет SQLite
+LOOKUP_CHUNK = 500
+# Поля записи; все они - строки
+FIELDS = ('text', 'author', 'group', 'pub_date')
+
+
+class RecordError(ValueError):
+    pass
+
+
+def read_jsonl(file, offset):
+    """Пары (смещение после записи, запись или RecordError)."""
+    file.seek(offset)
+    for line in file:
+        offset += len(line)
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            record = RecordError(f'неверный JSON: {error}')
+        if not isinstance(record, (dict, RecordError)):
+            record = RecordError('запись должна быть объектом JSON')
+        yield offset, record
+
+
+def read_csv(file, offset):
+    """То же для CSV с заголовком; поля могут занимать несколько строк."""
+    file.seek(0)
+    header = file.readline()
+    fieldnames = next(csv.reader([header.decode('utf-8-sig')]))
+    position = max(offset, len(header))
+    file.seek(position)
+
+    def lines():
+        nonlocal position
+        for line in file:
+            position += len(line)
+            yield line.decode('utf-8')
+
+    # csv читает строки по мере надобности, поэтому после каждой записи
+    # position указывает на ее конец
+    for row in csv.DictReader(lines(), fieldnames=fieldnames):
+        yield position, row
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def guess_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def check_fields(record):
+    """Запись или RecordError, если поле записи - не строка."""
+    for field in FIELDS:
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            return RecordError(f'поле {field} должно быть строкой')
+    return record
+
+
+def parse_pub_date(value):
+    if not value:
+        return timezone.now()
+    try:
+        pub_date = parse_datetime(value)
+    except ValueError as error:
+        # Формат верный, но дата невозможная: 2020-13-45
+        raise RecordError(f'неверная дата {value!r}: {error}')
+    if pub_date is None:
+        raise RecordError(f'неверная дата {value!r}')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+def inserted_rows(posts, last_pk):
+    """Пары (id, текст) постов, только что вставленных bulk_create.
+
+    SQLite не возвращает id из bulk_create, поэтому новые посты ищутся
+    после last_pk. В тот же диапазон попадают посты, созданные через сайт
+    во время загрузки, - их отличаем по автору, дате и тексту.
+    """
+    keys = {(post.author_id, post.pub_date, post.text) for post in posts}
+    rows = Post.objects.filter(pk__gt=last_pk).values_list(
+        'pk', 'author_id', 'pub_date', 'text'
+    )
+    return [(pk, text) for pk, author_id, pub_date, text in rows.iterator()
+            if (author_id, pub_date, text) in keys]
+
+
+def chunks(values, size=LOOKUP_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class PostImporter:
+    def __init__(self, path, file_format=None, batch_size=1000,
+                 create_authors=True, create_groups=True, log=None,
+                 report_every=5.0):
+        self.path = path
+        self.source = os.path.abspath(path)
+        self.read = READERS[file_format or guess_format(path)]
+        self.batch_size = batch_size
+        self.create_authors = create_authors
+        self.create_groups = create_groups
+        self.log = log or (lambda message: None)
+        self.report_every = report_every
+        self.authors = {}
+        self.groups = {}
+
+    def checkpoint(self, restart=False):
+        if restart:
+            ImportCheckpoint.objects.filter(source=self.source).delete()
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            source=self.source
+        )
+        if checkpoint.offset > os.path.getsize(self.path):
+            raise ValueError(
+                'Файл короче сохраненной позиции: он изменился, '
+                'начните заново с --restart'
+            )
+        return checkpoint
+
+    def run(self, restart=False, limit=None):
+        """Загружает файл с сохраненной позиции; limit - не больше
+        стольких записей за запуск. Возвращает итоги запуска."""
+        checkpoint = self.checkpoint(restart)
+        started = last_report = time.monotonic()
+        imported = skipped = 0
+        with open(self.path, 'rb') as file, keep_pub_date():
+            records = self.read(file, checkpoint.offset)
+            if limit is not None:
+                records = islice(records, limit)
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+                loaded, failed = self.load_batch(batch, checkpoint)
+                imported += loaded
+                skipped += failed
+                if time.monotonic() - last_report >= self.report_every:
+                    last_report = time.monotonic()
+                    self.log(self.progress(imported, skipped, started))
+        analyze()
+        elapsed = time.monotonic() - started
+        return {
+            'imported': imported,
+            'skipped': skipped,
+            'total': checkpoint.imported,
+            'elapsed': elapsed,
+            'rate': imported / elapsed if elapsed else 0.0,
+        }
+
+    def progress(self, imported, skipped, started):
+        elapsed = time.monotonic() - started
+        return (f'Загружено {imported}, пропущено {skipped}, '
+                f'{imported / elapsed:.0f} записей в секунду')
+
+    @transaction.atomic
+    def load_batch(self, batch, checkpoint):
+        batch = [(offset, record if isinstance(record, RecordError)
+                  else check_fields(record)) for offset, record in batch]
+        records = [record for _, record in batch
+                   if not isinstance(record, RecordError)]
+        self.resolve_authors({record.get('author') for record in records
+                              if record.get('author')})
+        self.resolve_groups({record.get('group') for record in records
+                             if record.get('group')})
+        posts = []
+        skipped = 0
+        for offset, record in batch:
+            try:
+                if isinstance(record, RecordError):
+                    raise record
+                posts.append(self.build_post(record))
+            except RecordError as error:
+                skipped += 1
+                self.log(f'Запись перед байтом {offset} пропущена: {error}')
+
+        last_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        Post.objects.bulk_create(posts)
+        search_index.index_new_posts(inserted_rows(posts, last_pk))
+        self.update_counters(posts)
+
+        checkpoint.offset = batch[-1][0]
+        checkpoint.imported += len(posts)
+        checkpoint.skipped += skipped
+        checkpoint.save()
+        return len(posts), skipped
+
+    def resolve_authors(self, usernames):
+        missing = usernames - self.authors.keys()
+        for chunk in chunks(missing):
+            self.authors.update(User.objects.filter(
+                username__in=chunk
+            ).values_list('username', 'pk'))
+        new = missing - self.authors.keys()
+        if new and self.create_authors:
+            User.objects.bulk_create(
+                User(username=username, password=make_password(None))
+                for username in new
+            )
+            for chunk in chunks(new):
+                self.authors.update(User.objects.filter(
+                    username__in=chunk
+                ).values_list('username', 'pk'))
+
+    def resolve_groups(self, slugs):
+        missing = slugs - self.groups.keys()
+        for chunk in chunks(missing):
+            self.groups.update(Group.objects.filter(
+                slug__in=chunk
+            ).values_list('slug', 'pk'))
+        new = missing - self.groups.keys()
+        if new and self.create_groups:
+            Group.objects.bulk_create(
+                Group(title=slug, slug=slug, description='')
+                for slug in new
+            )
+            for chunk in chunks(new):
+                self.groups.update(Group.objects.filter(
+                    slug__in=chunk
+                ).values_list('slug', 'pk'))
+
+    def build_post(self, record):
+        text = record.get('text') or ''
+        if not text.strip():
+            raise RecordError('пустой текст')
+        username = record.get('author')
+        if username not in self.authors:
+            raise RecordError(f'неизвестный автор {username!r}')
+        slug = record.get('group') or None
+        if slug is not None and slug not in self.groups:
+            raise RecordError(f'неизвестная группа {slug!r}')
+        return Post(
+            text=text,
+            author_id=self.authors[username],
+            group_id=self.groups.get(slug),
+            pub_date=parse_pub_date(record.get('pub_date')),
+        )
+
+    def update_counters(self, posts):
+        author_counts = Counter(post.author_id for post in posts)
+        group_counts = Counter(post.group_id for post in posts)
+        counters.add_post_counts(author_counts, group_counts)
+        # Версии лент обновятся и после коммита пачки
+        authors = {pk: name for name, pk in self.authors.items()
+                   if pk in author_counts}
+        groups = {pk: slug for slug, pk in self.groups.items()
+                  if pk in group_counts}
+        feed_cache.touch(
+            feed_cache.INDEX,
+            *(feed_cache.profile_scope(name) for name in authors.values()),
+            *(feed_cache.group_scope(slug) for slug in groups.values()),
+        )
+        group_stats.forget(*groups)
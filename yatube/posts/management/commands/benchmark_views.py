@@ -0,0 +1,89 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+def depth_list(value):
+    try:
+        depths = sorted({int(depth) for depth in value.split(',')})
+    except ValueError:
+        raise CommandError(f'Неверный список глубин: {value}')
+    if not depths or depths[0] < 1:
+        raise CommandError('Глубина страницы начинается с 1')
+    return depths
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время, SQL-запросы и память лент и страницы поста '
+            'на разной глубине и сохраняет отчет в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depths', type=depth_list,
+                            default=[1, 2, 5, 10, 100, 1000])
+        parser.add_argument('--repeats', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help='Не сбрасывать кэш перед запросами',
+        )
+        parser.add_argument('--views', nargs='+', choices=benchmark.VIEWS,
+                            default=list(benchmark.VIEWS))
+        parser.add_argument(
+            '--output',
+            help='Файл отчета (по умолчанию BENCHMARK_RESULTS_DIR)',
+        )
+        parser.add_argument(
+            '--compare', metavar='REPORT',
+            help='Сравнить с сохраненным ранее отчетом',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeats'] < 1:
+            raise CommandError('--repeats должен быть не меньше 1')
+        report = benchmark.run(
+            options['depths'], options['repeats'], options['warmup'],
+            cold=not options['warm_cache'], views=options['views'],
+        )
+        for row in report['results']:
+            latency = row['latency_ms']
+            self.stdout.write(
+                f'{row["view"]:<12} {row["case"]:<12} '
+                f'p50 {latency["p50"]:>9.2f} мс  '
+                f'p95 {latency["p95"]:>9.2f} мс  '
+                f'запросов {row["queries"]:>3}  '
+                f'память {row["peak_memory_kb"]:>9.1f} КБ'
+            )
+
+        output = options['output'] or self.default_output(report)
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Отчет сохранен: {output}'))
+
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+            self.stdout.write(
+                f'Сравнение с {baseline["meta"].get("commit") or "отчетом"}:'
+            )
+            for key in ('dataset', 'cache', 'database'):
+                if baseline['meta'].get(key) != report['meta'][key]:
+                    self.stderr.write(
+                        f'Отчеты не сравнимы по {key}: '
+                        f'{baseline["meta"].get(key)} и {report["meta"][key]}'
+                    )
+            for view, case, metric, old, new in benchmark.compare(
+                baseline, report
+            ):
+                change = f'{(new - old) / old:+.0%}' if old else ''
+                self.stdout.write(f'{view:<12} {case:<12} {metric:<8} '
+                                  f'{old:>9} -> {new:<9} {change}')
+
+    def default_output(self, report):
+        created = report['meta']['created'][:19].replace(':', '-')
+        name = '-'.join(filter(None, (created, report['meta']['commit'])))
+        return os.path.join(settings.BENCHMARK_RESULTS_DIR, f'{name}.json')
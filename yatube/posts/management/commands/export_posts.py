@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты в NDJSON или CSV потоком, с фильтрами по '
+            'группе, автору и датам')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=export.FORMATS,
+                            default='ndjson')
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--since', help='С даты (включительно)')
+        parser.add_argument('--until', help='До даты (не включая)')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int,
+                            default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        filters = {}
+        try:
+            if options['group']:
+                filters['group'] = Group.objects.get(slug=options['group'])
+            if options['author']:
+                filters['author'] = User.objects.get(
+                    username=options['author']
+                )
+            for name in ('since', 'until'):
+                if options[name]:
+                    filters[name] = export.parse_moment(options[name])
+        except (Group.DoesNotExist, User.DoesNotExist, ValueError) as error:
+            raise CommandError(error)
+
+        rows = export.iter_rows(export.filtered_posts(**filters),
+                                options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as file:
+                count = self.write(file.write, options['format'], rows)
+            self.stderr.write(f'Выгружено постов: {count}')
+        else:
+            self.write(lambda chunk: self.stdout.write(chunk, ending=''),
+                       options['format'], rows)
+
+    def write(self, write, file_format, rows):
+        lines = 0
+        for chunk in export.render(file_format, rows):
+            write(chunk)
+            lines += 1
+        # В CSV первая строка - заголовок
+        return lines - (file_format == 'csv')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша лент'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить счетчики после вывода')
+
+    def handle(self, *args, **options):
+        stats = feed_cache.stats()
+        self.stdout.write(
+            f'hits: {stats["hits"]}\n'
+            f'misses: {stats["misses"]}\n'
+            f'hit ratio: {stats["hit_ratio"]:.2%}'
+        )
+        if options['reset']:
+            feed_cache.reset_stats()
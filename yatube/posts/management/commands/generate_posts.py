@@ -0,0 +1,148 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from posts.bulk import finish_bulk_load, keep_pub_date
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу авторами, группами и постами для нагрузочных '
+            'замеров (benchmark_views)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=1000)
+        parser.add_argument(
+            '--heavy-author-posts', type=int, default=0,
+            help='Сколько постов (сверх --posts) у одного "тяжелого" автора',
+        )
+        parser.add_argument(
+            '--group-share', type=float, default=0.7,
+            help='Доля постов, опубликованных в группе',
+        )
+        parser.add_argument('--span-days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--texts', type=int, default=2000,
+            help='Сколько разных текстов сгенерировать для постов',
+        )
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--no-search-index', action='store_true',
+            help='Не строить поисковый индекс после загрузки',
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and options['authors'] < 1:
+            raise CommandError('Для постов нужен хотя бы один автор')
+        self.rng = random.Random(options['seed'])
+        mixer.faker.seed_instance(options['seed'])
+        started = time.monotonic()
+
+        prefix = options['prefix']
+        authors = self.create_authors(prefix, options['authors'])
+        heavy = (self.create_authors(f'{prefix}_heavy', 1)[0]
+                 if options['heavy_author_posts'] else None)
+        groups = self.create_groups(prefix, options['groups'])
+        texts = [mixer.faker.text(max_nb_chars=400)
+                 for _ in range(max(options['texts'], 1))]
+
+        created = self.create_posts(options, authors, heavy, groups, texts)
+        loaded = time.monotonic() - started
+        self.stdout.write(f'Постов: {created} за {loaded:.1f} с '
+                          f'({created / max(loaded, 1e-9):.0f} в секунду)')
+
+        with transaction.atomic():
+            result = finish_bulk_load(index=not options['no_search_index'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: авторов {len(authors) + bool(heavy)}, '
+            f'групп {len(groups)}, постов {created}, '
+            f'проиндексировано {result["indexed"] or 0}'
+        ))
+
+    def create_authors(self, prefix, count):
+        start = User.objects.filter(username__startswith=prefix).count()
+        with mixer.ctx(commit=False):
+            users = mixer.cycle(count).blend(
+                User,
+                username=mixer.sequence(
+                    lambda n: f'{prefix}_{start + n}'
+                ),
+                password=make_password(None),
+            )
+        User.objects.bulk_create(users, batch_size=500)
+        # SQLite не возвращает pk из bulk_create
+        return list(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).values_list('pk', flat=True))
+
+    def create_groups(self, prefix, count):
+        start = Group.objects.filter(slug__startswith=prefix).count()
+        with mixer.ctx(commit=False):
+            groups = mixer.cycle(count).blend(
+                Group,
+                slug=mixer.sequence(lambda n: f'{prefix}-{start + n}'),
+                posts_count=0,
+            )
+        Group.objects.bulk_create(groups, batch_size=500)
+        return list(Group.objects.filter(
+            slug__in=[group.slug for group in groups]
+        ).values_list('pk', flat=True))
+
+    def zipf_weights(self, count):
+        # Популярность авторов и групп распределена неравномерно;
+        # накопленные веса избавляют choices() от суммирования на каждом шаге
+        return list(accumulate(1 / rank for rank in range(1, count + 1)))
+
+    def create_posts(self, options, authors, heavy, groups, texts):
+        rng = self.rng
+        total = options['posts'] + options['heavy_author_posts']
+        heavy_positions = set(rng.sample(range(total),
+                                         options['heavy_author_posts']))
+        author_weights = self.zipf_weights(len(authors))
+        group_weights = self.zipf_weights(len(groups))
+        # Посты идут в порядке дат, как если бы их публиковали по очереди
+        step = timedelta(days=options['span_days']) / max(total, 1)
+        start = timezone.now() - step * total
+        batch_size = options['batch_size']
+
+        created = 0
+        with keep_pub_date():
+            for offset in range(0, total, batch_size):
+                positions = range(offset, min(offset + batch_size, total))
+                batch = []
+                for position in positions:
+                    if position in heavy_positions:
+                        author = heavy
+                    else:
+                        author = rng.choices(
+                            authors, cum_weights=author_weights)[0]
+                    group = None
+                    if groups and rng.random() < options['group_share']:
+                        group = rng.choices(
+                            groups, cum_weights=group_weights)[0]
+                    batch.append(Post(
+                        text=rng.choice(texts),
+                        author_id=author,
+                        group_id=group,
+                        pub_date=start + step * position,
+                    ))
+                with transaction.atomic():
+                    Post.objects.bulk_create(batch)
+                created += len(batch)
+                self.stdout.write(f'  {created}/{total}', ending='\r')
+        self.stdout.write('')
+        return created
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from posts.models import Post
+from posts.thumbnails import generate_post_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создает недостающие миниатюры картинок всех постов'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(
+            thumbnails_for=F('image')
+        ).values_list('pk', flat=True)
+        done = 0
+        for post_id in posts.iterator():
+            try:
+                generate_post_thumbnails(post_id)
+            except RuntimeError as error:
+                self.stderr.write(str(error))
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Созданы миниатюры картинок: {done}'
+        ))
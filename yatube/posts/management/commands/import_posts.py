@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import READERS, PostImporter
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты из JSONL или CSV пачками; прерванная загрузка '
+            'продолжается с сохраненной позиции')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=READERS,
+                            help='По умолчанию - по расширению файла')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--limit', type=int,
+            help='Загрузить не больше стольких записей за запуск',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать файл сначала, забыв сохраненную позицию',
+        )
+        parser.add_argument(
+            '--no-create-authors', action='store_true',
+            help='Пропускать записи неизвестных авторов',
+        )
+        parser.add_argument(
+            '--no-create-groups', action='store_true',
+            help='Пропускать записи неизвестных групп',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1')
+        importer = PostImporter(
+            options['path'],
+            file_format=options['format'],
+            batch_size=options['batch_size'],
+            create_authors=not options['no_create_authors'],
+            create_groups=not options['no_create_groups'],
+            log=self.stderr.write,
+        )
+        try:
+            result = importer.run(restart=options['restart'],
+                                  limit=options['limit'])
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {result["imported"]}, пропущено {result["skipped"]} '
+            f'за {result["elapsed"]:.1f} с '
+            f'({result["rate"]:.0f} записей в секунду); '
+            f'всего из файла: {result["total"]}'
+        ))
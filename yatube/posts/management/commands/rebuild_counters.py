@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import rebuild_post_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счетчики постов авторов и групп'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            authors, groups = rebuild_post_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счетчики пересчитаны: авторов {authors}, групп {groups}'
+        ))
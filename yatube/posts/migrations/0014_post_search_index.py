@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:14
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия posts.search_index.tokenize на момент миграции: данные миграции
+# не должны меняться вместе с кодом приложения
+WORD_RE = re.compile(r'\w+')
+MIN_TERM_LENGTH = 2
+
+
+def tokenize(text, max_length):
+    return [word[:max_length]
+            for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+            if len(word) >= MIN_TERM_LENGTH]
+
+
+def fill_search_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostTerm = apps.get_model('posts', 'PostTerm')
+    max_length = PostTerm._meta.get_field('term').max_length
+    for post_id, text in Post.objects.values_list('pk', 'text').iterator():
+        PostTerm.objects.bulk_create(
+            PostTerm(term=term, post_id=post_id, frequency=frequency)
+            for term, frequency in Counter(tokenize(text, max_length)).items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('frequency', models.PositiveIntegerField(default=1, verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'unique_together': {('term', 'post')},
+            },
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:48
+
+from django.db import migrations
+import posts.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=posts.images.PostImageField(blank=True, upload_to='posts/', validators=[posts.images.validate_image_upload], verbose_name='Картинка'),
+        ),
+    ]
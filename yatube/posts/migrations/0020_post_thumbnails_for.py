@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_for',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Миниатюры созданы для'),
+        ),
+    ]
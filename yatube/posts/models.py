@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from .images import PostImageField
 from .validators import validate_not_empty
 
 User = get_user_model()
@@ -9,14 +10,27 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ['title']
+        # Каталог групп выводится по алфавиту страницами
+        indexes = [models.Index(fields=['title'], name='group_title_idx')]
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты вместе с авторами и группами, загруженными одним JOIN."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст записи',
@@ -27,6 +41,11 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    # Метка изменения: входит в ключ кэша карточки поста (cards.py)
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -44,14 +63,191 @@ class Post(models.Model):
         help_text='Выберите группу'
     )
 
-    image = models.ImageField(
+    image = PostImageField(
         verbose_name='Картинка',
         upload_to='posts/',
         blank=True
     )
+    # Картинка, для которой фоновая задача уже создала миниатюры: шаблоны
+    # строят их URL без запросов к хранилищу sorl (thumbnails.py)
+    thumbnails_for = models.CharField(
+        verbose_name='Миниатюры созданы для',
+        max_length=100,
+        blank=True,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        # Индексы под каждую ленту: ORDER BY pub_date DESC, id DESC
+        # с фильтром по автору, по группе и без фильтра
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_feed_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_feed_idx'),
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_feed_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем группу из БД, чтобы при смене группы поправить счетчики
+        loaded = dict(zip(field_names, values))
+        if 'group_id' in loaded:
+            instance._loaded_group_id = loaded['group_id']
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Счетчики обновляются в post_save, в одной транзакции с постом
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class PostTerm(models.Model):
+    """Запись инвертированного индекса поиска: слово -> пост."""
+    term = models.CharField(verbose_name='Слово', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='terms',
+        verbose_name='Пост'
+    )
+    frequency = models.PositiveIntegerField(
+        verbose_name='Число вхождений',
+        default=1
+    )
+
+    class Meta:
+        unique_together = ('term', 'post')
+
+    def __str__(self):
+        return f'{self.term} -> {self.post_id}'
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счетчики автора."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Число подписчиков',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='no_self_follow'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в персональной ленте подписчика (см. timeline.py).
+
+    pub_date и author копируются из поста, чтобы лента читалась по одному
+    индексу, а отписка удаляла записи автора без JOIN.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_feed_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.post_id}'
+
+
+class ImportCheckpoint(models.Model):
+    """Место, до которого import_posts загрузил файл.
+
+    Обновляется в одной транзакции с пачкой постов, поэтому повторный
+    запуск продолжает ровно с первой незагруженной записи.
+    """
+    source = models.CharField(
+        verbose_name='Файл',
+        max_length=255,
+        unique=True
+    )
+    offset = models.BigIntegerField(
+        verbose_name='Смещение в байтах',
+        default=0
+    )
+    imported = models.PositiveIntegerField(
+        verbose_name='Загружено записей',
+        default=0
+    )
+    skipped = models.PositiveIntegerField(
+        verbose_name='Пропущено записей',
+        default=0
+    )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+
+    def __str__(self):
+        return f'{self.source}: {self.imported}'
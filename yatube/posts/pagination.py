@@ -0,0 +1,313 @@
+import base64
+import binascii
+import collections.abc
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import connections, DatabaseError
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core.db_router import use_primary
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+# Порядок ленты, на который опирается курсор: (pub_date, id) по убыванию
+FEED_ORDERING = ('-pub_date', '-pk')
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, pub_date, pk):
+    """Упаковывает позицию в ленте в непрозрачный токен для URL."""
+    payload = f'{direction}|{pub_date.isoformat()}|{pk}'
+    token = base64.urlsafe_b64encode(payload.encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (direction, pub_date, pk) из токена курсора."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = payload.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        raise InvalidCursor(token)
+    return direction, pub_date, pk
+
+
+def after(pub_date, pk, id_field='pk'):
+    """Условие "строго старше позиции" в порядке FEED_ORDERING.
+
+    Диапазон по pub_date вынесен отдельно, чтобы SQLite начинал
+    просмотр индекса с нужной позиции, а не с начала ленты. id_field -
+    поле с id поста, если выборка идет не по постам.
+    """
+    return Q(pub_date__lte=pub_date) & (Q(pub_date__lt=pub_date)
+                                        | Q(**{f'{id_field}__lt': pk}))
+
+
+def before(pub_date, pk, id_field='pk'):
+    """Условие "строго новее позиции" в порядке FEED_ORDERING."""
+    return Q(pub_date__gte=pub_date) & (Q(pub_date__gt=pub_date)
+                                        | Q(**{f'{id_field}__gt': pk}))
+
+
+class FeedPage(Page):
+    @cached_property
+    def next_cursor(self):
+        """Курсор на продолжение ленты со страниц глубже PAGE_CURSOR_DEPTH.
+
+        Вычисляется лениво, чтобы не читать посты страницы, пока их не
+        попросил шаблон (например, при попадании в кэш ленты).
+        """
+        if (not self.paginator.allow_cursor
+                or self.number < settings.PAGE_CURSOR_DEPTH
+                or not self.has_next()
+                or not self.object_list):
+            return None
+        last = self[-1]
+        return encode_cursor(NEXT, last.pub_date, last.pk)
+
+    @property
+    def page_window(self):
+        """Номера страниц вокруг текущей вместо полного page_range."""
+        first = max(self.number - settings.PAGINATOR_WINDOW, 1)
+        last = min(self.number + settings.PAGINATOR_WINDOW,
+                   self.paginator.num_pages)
+        return range(first, last + 1)
+
+    def has_pages_before_window(self):
+        return self.page_window[0] > 1
+
+    def has_pages_after_window(self):
+        return self.page_window[-1] < self.paginator.num_pages
+
+
+def estimate_count(queryset, threshold=0):
+    """Приблизительное число строк таблицы без полного COUNT(*).
+
+    Годится только для ленты без фильтров. Сначала берется максимальный
+    id (один шаг по индексу); если он не меньше threshold, оценка
+    уточняется по статистике SQLite (sqlite_stat1, заполняется ANALYZE).
+    """
+    last_id = queryset.aggregate(last_id=Max('pk'))['last_id'] or 0
+    if last_id < threshold:
+        return last_id
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    if connection.vendor == 'sqlite':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                    [table]
+                )
+                row = cursor.fetchone()
+            if row:
+                return int(row[0].split()[0])
+        except DatabaseError:
+            pass
+    return last_id
+
+
+# (таблица, порог), для которых последний COUNT(*) был меньше порога:
+# оценка для них не нужна, и считать можно сразу одним запросом
+_small_tables = set()
+
+
+class FeedPaginator(Paginator):
+    """Paginator лент без лишнего SELECT COUNT(*).
+
+    Число объектов берется, по порядку: из переданного count (счетчик
+    автора/группы); из кэша по count_key (на PAGINATOR_COUNT_TIMEOUT
+    секунд); при estimate=True для таблиц больше PAGINATOR_ESTIMATE_THRESHOLD
+    строк - из оценки estimate_count(); иначе обычным COUNT(*).
+    allow_cursor=False отключает переход на курсор для выборок, которые
+    упорядочены не по (pub_date, id), например для результатов поиска.
+    """
+
+    def __init__(self, object_list, per_page, count=None, count_key=None,
+                 estimate=False, allow_cursor=True, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.allow_cursor = allow_cursor
+        self.count_key = count_key
+        self.estimate = estimate
+        self.estimated = False
+        if count is not None:
+            self.count = count
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return self._count()
+        cached = cache.get(self.count_key)
+        if cached is None:
+            # Число уходит в кэш под текущей версией ленты: не с реплики
+            with use_primary():
+                cached = (self._count(), self.estimated)
+            cache.set(self.count_key, cached,
+                      settings.PAGINATOR_COUNT_TIMEOUT)
+        count, self.estimated = cached
+        return count
+
+    def _count(self):
+        threshold = settings.PAGINATOR_ESTIMATE_THRESHOLD
+        table = (self.object_list.model._meta.db_table, threshold)
+        if self.estimate and table not in _small_tables:
+            estimated = estimate_count(self.object_list, threshold)
+            if estimated >= threshold:
+                self.estimated = True
+                return estimated
+        count = super().count
+        if self.estimate:
+            if count < threshold:
+                _small_tables.add(table)
+            else:
+                _small_tables.discard(table)
+        return count
+
+    def get_page(self, number):
+        page = super().get_page(number)
+        if self.estimated and page.number > 1 and not page.object_list:
+            # Оценка завышена (после удалений), и страница оказалась за
+            # концом ленты: считаем точно и отдаем последнюю страницу
+            self.count = self.object_list.count()
+            self.estimated = False
+            self.__dict__.pop('num_pages', None)
+            if self.count_key is not None:
+                cache.set(self.count_key, (self.count, False),
+                          settings.PAGINATOR_COUNT_TIMEOUT)
+            page = super().get_page(number)
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+def row_position(row):
+    """(pub_date, id) поста или строки values() с ключами pub_date и pk."""
+    if isinstance(row, dict):
+        return row['pub_date'], row['pk']
+    return row.pub_date, row.pk
+
+
+class CursorPage(collections.abc.Sequence):
+    """Страница курсорной паджинации, совместимая по интерфейсу с Page."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(NEXT, *row_position(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(PREVIOUS, *row_position(self.object_list[0]))
+
+
+class CursorPaginator:
+    """Keyset-паджинация по (pub_date, id) без OFFSET.
+
+    Каждая страница читается одним запросом LIMIT per_page + 1 от позиции
+    курсора, поэтому стоимость не зависит от глубины страницы.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset.order_by(*FEED_ORDERING)
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        if not cursor:
+            return self._forward(self.queryset, has_previous=False)
+        direction, pub_date, pk = decode_cursor(cursor)
+        if direction == NEXT:
+            return self._forward(
+                self.queryset.filter(after(pub_date, pk)), has_previous=True
+            )
+        return self._backward(self.queryset.filter(before(pub_date, pk)))
+
+    def get_page(self, cursor=None):
+        """Как page(), но неразборчивый курсор ведет на первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    def _forward(self, queryset, has_previous):
+        rows = list(queryset[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page], self,
+                          has_next=len(rows) > self.per_page,
+                          has_previous=has_previous)
+
+    def _backward(self, queryset):
+        queryset = queryset.reverse()
+        rows = list(queryset[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page][::-1], self,
+                          has_next=True,
+                          has_previous=len(rows) > self.per_page)
+
+
+def pagination(queryset, request, **count_options):
+    """Контекст паджинации для лент постов.
+
+    По умолчанию работает нумерованный режим (?page=N). Начиная со страницы
+    PAGE_CURSOR_DEPTH ссылка "Следующая" переводит в курсорный режим
+    (?cursor=...), где глубокие страницы не требуют OFFSET.
+    count_options (count, count_key, estimate) передаются в FeedPaginator.
+    """
+    cursor = request.GET.get('cursor')
+    if cursor:
+        paginator = CursorPaginator(queryset, settings.PAGE_LIMIT)
+        return {'paginator': paginator,
+                'page_number': None,
+                'page_obj': paginator.get_page(cursor),
+                'cursor_mode': True,
+                'position': f'cursor-{cursor}',
+                }
+
+    paginator = FeedPaginator(queryset.order_by(*FEED_ORDERING),
+                              settings.PAGE_LIMIT, **count_options)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    return {'paginator': paginator,
+            'page_number': page_number,
+            'page_obj': page_obj,
+            'cursor_mode': False,
+            'position': f'page-{page_obj.number}',
+            }
@@ -0,0 +1,94 @@
+"""Полнотекстовый поиск по постам на инвертированном индексе (PostTerm).
+
+Текст поста разбивается на слова (tokenize); для каждого слова хранится
+число его вхождений в пост. Поиск находит посты, содержащие все слова
+запроса, и ранжирует их по TF-IDF. Индекс обновляется в сигналах Post,
+rebuild_index() строит его заново.
+"""
+import math
+import re
+from collections import Counter
+
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              Sum, Value, When)
+
+from .models import Post, PostTerm
+
+WORD_RE = re.compile(r'\w+')
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = PostTerm._meta.get_field('term').max_length
+
+
+def tokenize(text):
+    """Нормализованные слова текста: нижний регистр, ё -> е."""
+    return [word[:MAX_TERM_LENGTH]
+            for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+            if len(word) >= MIN_TERM_LENGTH]
+
+
+def post_terms(post_id, text):
+    return [PostTerm(term=term, post_id=post_id, frequency=frequency)
+            for term, frequency in Counter(tokenize(text)).items()]
+
+
+def index_post(post):
+    PostTerm.objects.filter(post_id=post.pk).delete()
+    PostTerm.objects.bulk_create(post_terms(post.pk, post.text))
+
+
+def index_new_posts(rows):
+    """Индексирует только что созданные посты: rows - пары (id, текст)."""
+    PostTerm.objects.bulk_create(
+        [term for post_id, text in rows for term in post_terms(post_id, text)]
+    )
+
+
+def rebuild_index(batch_size=1000):
+    """Строит индекс заново, возвращает число проиндексированных постов."""
+    PostTerm.objects.all().delete()
+    batch = []
+    indexed = 0
+    posts = Post.objects.order_by().values_list('pk', 'text')
+    for post_id, text in posts.iterator(chunk_size=batch_size):
+        batch.extend(post_terms(post_id, text))
+        indexed += 1
+        if len(batch) >= batch_size:
+            PostTerm.objects.bulk_create(batch)
+            batch = []
+    PostTerm.objects.bulk_create(batch)
+    return indexed
+
+
+def ranked_posts(query):
+    """Строки {'post': id, 'score': ...} постов со всеми словами запроса,
+    от наиболее релевантных. Запрос ленивый, его можно паджинировать."""
+    terms = set(tokenize(query))
+    found = dict(
+        PostTerm.objects.filter(term__in=terms).order_by().values_list(
+            'term'
+        ).annotate(Count('post'))
+    )
+    if not terms or len(found) < len(terms):
+        return PostTerm.objects.none().values('post')
+    total = Post.objects.count()
+    score = Sum(Case(
+        *(When(term=term, then=ExpressionWrapper(
+            F('frequency') * Value(math.log(1 + total / frequency)),
+            output_field=FloatField()
+        )) for term, frequency in found.items()),
+        output_field=FloatField(),
+    ))
+    return PostTerm.objects.filter(term__in=terms).values('post').annotate(
+        matched=Count('term'), score=score
+    ).filter(matched=len(terms)).order_by('-score', '-post')
+
+
+def matching_post_ids(query):
+    return ranked_posts(query).values('post')
+
+
+def posts_in_order(rows):
+    """Посты для строк ranked_posts() в том же порядке."""
+    ids = [row['post'] for row in rows]
+    posts = Post.objects.for_feed().in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,149 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import (counters, feed_cache, group_stats, search_index, thumbnails,
+               timeline)
+from .models import Follow, Group, Post
+
+User = get_user_model()
+
+# Поля пользователя, которые выводятся в ленте
+AUTHOR_FEED_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=Post)
+def remember_loaded_group(sender, instance, **kwargs):
+    if instance.pk is None or hasattr(instance, '_loaded_group_id'):
+        return
+    # Пост собран не из БД (например, Post(pk=...)): берем группу из базы
+    instance._loaded_group_id = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+def author_feed_scopes(author_ids):
+    """Ленты, в которых выводятся посты авторов."""
+    usernames = User.objects.filter(pk__in=author_ids).values_list(
+        'username', flat=True
+    )
+    slugs = Group.objects.filter(
+        posts__author__in=author_ids
+    ).values_list('slug', flat=True).distinct()
+    return {feed_cache.INDEX,
+            *(feed_cache.profile_scope(name) for name in usernames),
+            *(feed_cache.group_scope(slug) for slug in slugs)}
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    previous = None if created else instance._loaded_group_id
+    if created:
+        counters.shift_author_count(instance.author_id, 1)
+        counters.shift_group_count(instance.group_id, 1)
+        group_stats.post_added(instance)
+        if timeline.has_followers(instance.author_id):
+            timeline.fan_out_post.enqueue(instance.pk)
+    elif previous != instance.group_id:
+        counters.shift_group_count(previous, -1)
+        counters.shift_group_count(instance.group_id, 1)
+        group_stats.forget(previous)
+        group_stats.post_added(instance)
+    instance._loaded_group_id = instance.group_id
+    feed_cache.touch(*feed_cache.post_scopes(
+        instance, {previous, instance.group_id}
+    ))
+    search_index.index_post(instance)
+    thumbnails.schedule_post_thumbnails(instance)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    counters.shift_author_count(instance.author_id, -1)
+    counters.shift_group_count(instance.group_id, -1)
+    group_stats.forget(instance.group_id)
+    feed_cache.touch(*feed_cache.post_scopes(instance))
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    instance._previous_slug = Group.objects.filter(
+        pk=instance.pk
+    ).values_list('slug', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feeds(sender, instance, created, **kwargs):
+    previous = instance._previous_slug
+    if created:
+        return
+    if previous == instance.slug:
+        # Заголовок и описание видны только на странице группы; версия
+        # ее ленты - еще и валидатор условных GET (conditional.py)
+        feed_cache.touch(feed_cache.group_scope(instance.slug))
+        return
+    # Сменился slug: ссылки на группу есть во всех лентах ее авторов
+    author_ids = instance.posts.values_list('author', flat=True).distinct()
+    feed_cache.touch(feed_cache.group_scope(previous),
+                     feed_cache.group_scope(instance.slug),
+                     *author_feed_scopes(list(author_ids)))
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_deleted_group_feeds(sender, instance, **kwargs):
+    author_ids = instance.posts.values_list('author', flat=True).distinct()
+    feed_cache.touch(feed_cache.group_scope(instance.slug),
+                     *author_feed_scopes(list(author_ids)))
+    group_stats.forget(instance.pk)
+
+
+def touches_author_fields(update_fields):
+    # Например, вход пользователя сохраняет только last_login
+    return update_fields is None or bool(
+        set(update_fields) & set(AUTHOR_FEED_FIELDS)
+    )
+
+
+@receiver(pre_save, sender=User)
+def remember_author_fields(sender, instance, update_fields, **kwargs):
+    instance._previous_feed_fields = None
+    if instance.pk and touches_author_fields(update_fields):
+        instance._previous_feed_fields = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*AUTHOR_FEED_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, created, **kwargs):
+    previous = instance._previous_feed_fields
+    current = tuple(getattr(instance, name) for name in AUTHOR_FEED_FIELDS)
+    if created or previous is None or previous == current:
+        return
+    feed_cache.touch(feed_cache.profile_scope(previous[0]),
+                     *author_feed_scopes([instance.pk]))
+    if previous[0] != instance.username:
+        # Каталог групп выводит самых активных авторов по username
+        group_stats.forget(*Group.objects.filter(
+            posts__author=instance
+        ).values_list('pk', flat=True).distinct())
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if not created:
+        return
+    counters.shift_follower_count(instance.author_id, 1)
+    if timeline.fans_out(Follow.objects.filter(
+            author_id=instance.author_id).count()):
+        timeline.backfill(instance.user_id, instance.author_id)
+    # Профиль выводит число подписчиков
+    feed_cache.touch(feed_cache.profile_scope(instance.author.username))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.shift_follower_count(instance.author_id, -1)
+    timeline.forget_author(instance.user_id, instance.author_id)
+    timeline.follower_left(instance.author_id)
+    feed_cache.touch(feed_cache.profile_scope(instance.author.username))
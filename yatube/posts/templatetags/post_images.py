@@ -0,0 +1,14 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail_url(post, size='feed'):
+    """URL готовой миниатюры или заглушки, пока миниатюра создается."""
+    return (thumbnails.thumbnail_url(post, size)
+            or static(settings.THUMBNAIL_PLACEHOLDER))
@@ -0,0 +1,41 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import cards, feed_cache
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        key = context.get('feed_cache_key')
+        if key is None:
+            return self.nodelist.render(context)
+        return feed_cache.get_or_render(
+            key, lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag(name='feed_cache')
+def do_feed_cache(parser, token):
+    """Кэширует список постов ленты по ключу feed_cache_key из контекста.
+
+    {% feed_cache %}{% for post in page_obj %}...{% endfeed_cache %}
+    """
+    nodelist = parser.parse(('endfeed_cache',))
+    parser.delete_first_token()
+    return FeedCacheNode(nodelist)
+
+
+@register.simple_tag
+def post_cards(posts, show_group=True):
+    """Карточки постов из кэша (cards.py), одна выборка на страницу.
+
+    {% post_cards page_obj show_group=False as cards %}
+    {% for card in cards %}{{ card }}{% endfor %}
+    """
+    return [mark_safe(card)
+            for card in cards.render_cards(posts, show_group)]
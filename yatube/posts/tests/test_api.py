@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetTestMixin
+
+from .test_models import BaseTest, Post, User
+
+
+class FeedApiTests(QueryBudgetTestMixin, BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(14):
+            Post.objects.create(author=cls.user, text=f'Пост {number}',
+                                group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pages_cover_feed(self):
+        """Ссылки next проходят ленту целиком в порядке HTML-ленты."""
+        url = reverse('api:index') + '?limit=4'
+        seen = []
+        for _ in range(10):
+            data = self.guest_client.get(url).json()
+            seen += [row['id'] for row in data['results']]
+            if data['next'] is None:
+                break
+            self.assertTrue(data['next'].startswith('http://testserver/'))
+            self.assertIn('limit=4', data['next'])
+            url = data['next'].replace('http://testserver', '')
+        self.assertEqual(seen, list(Post.objects.values_list('pk',
+                                                             flat=True)))
+
+    def test_sparse_fields(self):
+        """В ответе только запрошенные поля, а JOIN нужен только для них."""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.guest_client.get(reverse('api:index'),
+                                         {'fields': 'id,text'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        self.assertNotIn('JOIN', queries[-1]['sql'])
+        response = self.guest_client.get(
+            reverse('api:profile', kwargs={'username': 'guest_test_user'}),
+            {'fields': 'author,group,pub_date'},
+        )
+        row = response.json()['results'][0]
+        self.assertEqual(row['author'], 'guest_test_user')
+        self.assertEqual(row['group'], 'test-slug')
+
+    def test_post_detail(self):
+        post = Post.objects.first()
+        data = self.guest_client.get(
+            reverse('api:post_detail', kwargs={'post_id': post.pk})
+        ).json()
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(data['url'], reverse('posts:post_detail',
+                                              kwargs={'post_id': post.pk}))
+        self.assertIsNone(data['image'])
+
+    def test_errors(self):
+        cases = (
+            (reverse('api:index'), {'fields': 'password'}, 400),
+            (reverse('api:index'), {'cursor': 'не-курсор'}, 400),
+            (reverse('api:index'), {'limit': 1000}, 400),
+            (reverse('api:index'), {'limit': '²'}, 400),
+            (reverse('api:index'), {'limit': '-1'}, 400),
+            (reverse('api:group_posts', kwargs={'slug': 'missing'}), {},
+             404),
+            (reverse('api:post_detail', kwargs={'post_id': 10 ** 6}), {},
+             404),
+        )
+        for url, params, status in cases:
+            with self.subTest(url=url, params=params):
+                response = self.guest_client.get(url, params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+
+    def test_api_within_query_budget(self):
+        author = User.objects.get(username='guest_test_user')
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('api:profile', kwargs={'username': author.username}),
+            reverse('api:post_detail',
+                    kwargs={'post_id': Post.objects.first().pk}),
+        )
+        for client in (self.guest_client, self.authorized_client):
+            for url in urls:
+                with self.subTest(url=url):
+                    self.assertWithinQueryBudget(client, url)
@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+
+from ..models import AuthorStats, Group, Post, PostTerm
+from .test_models import BaseTest
+
+
+class BenchmarkTests(BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('generate_posts', posts=40, authors=3, groups=2,
+                     heavy_author_posts=30, texts=5, seed=1,
+                     stdout=StringIO())
+
+    def test_generated_data(self):
+        """Генератор создает посты с разными датами и приводит в порядок
+        счетчики и поисковый индекс."""
+        self.assertEqual(Post.objects.count(), 71)
+        self.assertEqual(Group.objects.filter(slug__startswith='bench')
+                         .count(), 2)
+        heavy = AuthorStats.objects.get(author__username='bench_heavy_0')
+        self.assertEqual(heavy.posts_count, 30)
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('posts_count', flat=True)),
+            71,
+        )
+        self.assertEqual(Post.objects.values('pub_date').distinct().count(),
+                         71)
+        self.assertEqual(
+            PostTerm.objects.values('post').distinct().count(), 71
+        )
+
+    def test_report(self):
+        """Отчет содержит перцентили, запросы и память по каждому случаю
+        и сравнивается с предыдущим."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+            call_command('benchmark_views', depths=[1, 2], repeats=2,
+                         warmup=0, output=output, stdout=StringIO())
+            with open(output) as file:
+                report = json.load(file)
+            out = StringIO()
+            call_command('benchmark_views', depths=[1], repeats=1,
+                         warmup=0, output=output, compare=output,
+                         stdout=out)
+        cases = {(row['view'], row['case']) for row in report['results']}
+        self.assertLessEqual({('index', 'page=1'), ('index', 'cursor@2'),
+                              ('group_posts', 'page=2'),
+                              ('profile', 'cursor@2'),
+                              ('post_detail', 'oldest')}, cases)
+        row = report['results'][0]
+        self.assertLessEqual(row['latency_ms']['p50'],
+                             row['latency_ms']['p99'])
+        self.assertGreater(row['queries'], 0)
+        self.assertGreater(row['peak_memory_kb'], 0)
+        self.assertEqual(report['meta']['dataset']['posts'], 71)
+        self.assertIn('p95', out.getvalue())
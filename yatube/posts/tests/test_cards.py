@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from ..cards import card_key
+from ..models import Post
+from .test_models import BaseTest
+
+
+class PostCardCacheTests(BaseTest):
+    def setUp(self):
+        cache.clear()
+
+    def card(self, show_group=True):
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        return cache.get(card_key(post, show_group))
+
+    def test_card_shared_by_feeds(self):
+        """Все ленты выводят одну и ту же закэшированную карточку."""
+        cache.set(card_key(Post.objects.for_feed().get(pk=self.post.pk)),
+                  'Карточка из кэша')
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'guest_test_user'}),
+            reverse('posts:search') + '?q=тестовой',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Карточка из кэша')
+
+    def test_group_feed_card_has_no_group_link(self):
+        self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        )
+        self.assertNotIn('Все записи группы', self.card(show_group=False))
+        self.guest_client.get(reverse('posts:index'))
+        self.assertIn('Все записи группы', self.card())
+
+    def test_post_edit_invalidates_card(self):
+        self.guest_client.get(reverse('posts:index'))
+        old_key = card_key(Post.objects.for_feed().get(pk=self.post.pk))
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Исправленный текст', 'group': self.group.pk},
+        )
+        self.assertNotEqual(
+            card_key(Post.objects.for_feed().get(pk=self.post.pk)), old_key
+        )
+        self.assertContains(self.guest_client.get(reverse('posts:index')),
+                            'Исправленный текст')
+        self.assertIn('Исправленный текст', self.card())
+
+    def test_author_name_changes_card(self):
+        self.guest_client.get(reverse('posts:index'))
+        self.user.first_name = 'Новое'
+        self.user.last_name = 'Имя'
+        self.user.save()
+        self.assertIsNone(self.card())
+        self.assertContains(self.guest_client.get(reverse('posts:index')),
+                            'Новое Имя')
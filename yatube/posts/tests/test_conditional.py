@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from .test_models import BaseTest
+
+
+class ConditionalGetTests(BaseTest):
+    def setUp(self):
+        cache.clear()
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'guest_test_user'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def test_not_modified_until_post_changes(self):
+        """Страница без изменений отдается как 304, после правки поста -
+        целиком."""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_not_modified_skips_queries(self):
+        url = self.urls[0]
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        url = self.urls[1]
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_group_edit_changes_group_page(self):
+        url = self.urls[1]
+        etag = self.guest_client.get(url)['ETag']
+        self.group.description = 'Новое описание'
+        self.group.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новое описание')
+
+    def test_group_title_changes_post_page(self):
+        """Страница поста выводит заголовок группы."""
+        url = self.urls[3]
+        etag = self.guest_client.get(url)['ETag']
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новый заголовок')
+
+    def test_cache_control_depends_on_user(self):
+        """Авторизованный получает свой ETag и приватный Cache-Control."""
+        url = self.urls[3]
+        guest = self.guest_client.get(url)
+        author = self.authorized_client.get(url)
+        self.assertIn('public', guest['Cache-Control'])
+        self.assertIn('private', author['Cache-Control'])
+        self.assertIn('Cookie', author['Vary'])
+        self.assertFalse(author.has_header('Last-Modified'))
+        self.assertNotEqual(guest['ETag'], author['ETag'])
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=guest['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_post(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6}),
+            HTTP_IF_NONE_MATCH='*',
+        )
+        self.assertEqual(response.status_code, 404)
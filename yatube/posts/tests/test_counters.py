@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from ..models import AuthorStats
+from .test_models import BaseTest, Group, Post, User
+
+
+class PostCountersTests(BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.other_group = Group.objects.create(
+            title='Вторая группа',
+            slug='other-slug',
+            description='Описание второй группы',
+        )
+
+    def counts(self):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        return (AuthorStats.objects.get(author=self.user).posts_count,
+                self.group.posts_count,
+                self.other_group.posts_count)
+
+    def test_counters_follow_create_edit_delete(self):
+        """Счетчики меняются при создании, смене группы и удалении."""
+        self.assertEqual(self.counts(), (1, 1, 0))
+        post = Post.objects.create(author=self.user, text='Новый',
+                                   group=self.group)
+        self.assertEqual(self.counts(), (2, 2, 0))
+
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.counts(), (2, 1, 1))
+
+        post.group = None
+        post.save()
+        self.assertEqual(self.counts(), (2, 1, 0))
+
+        post.delete()
+        self.assertEqual(self.counts(), (1, 1, 0))
+
+    def test_rebuild_command_restores_counters(self):
+        """rebuild_counters пересчитывает разошедшиеся счетчики."""
+        Post.objects.create(author=self.user, text='Еще',
+                            group=self.other_group)
+        AuthorStats.objects.all().delete()
+        Group.objects.update(posts_count=100)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(self.counts(), (2, 1, 1))
+
+    def test_author_deletion_with_posts(self):
+        author = User.objects.create_user(username='leaving_author')
+        Post.objects.create(author=author, text='Пост', group=self.group)
+        author.delete()
+        self.assertEqual(self.counts(), (1, 1, 0))
+
+    def test_views_read_counters(self):
+        """Профиль и страница поста показывают число из счетчика."""
+        AuthorStats.objects.filter(author=self.user).update(posts_count=7)
+        urls = (
+            reverse('posts:profile', kwargs={'username': 'guest_test_user'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.context['posts_count'], 7)
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..export import filtered_posts, iter_rows
+from .test_models import BaseTest, Post, User
+
+
+class ExportPostsTests(BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.other = User.objects.create_user(username='other_author')
+        start = timezone.make_aware(datetime(2021, 1, 1))
+        for number in range(7):
+            post = Post.objects.create(author=cls.other,
+                                       text=f'Старый пост {number}',
+                                       group=cls.group)
+            # pub_date задается auto_now_add, меняем его в обход save()
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=start + timedelta(days=number)
+            )
+
+    def export(self, **params):
+        response = self.authorized_client.get(reverse('posts:export'),
+                                              params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_filters(self):
+        """Выгрузка фильтруется по группе, автору и датам, от старых
+        постов к новым."""
+        rows = [json.loads(line) for line in self.export(
+            author='other_author', group='test-slug',
+            since='2021-01-02', until='2021-01-05',
+        ).splitlines()]
+        self.assertEqual([row['text'] for row in rows],
+                         [f'Старый пост {number}' for number in (1, 2, 3)])
+        self.assertEqual(rows[0]['author'], 'other_author')
+        self.assertEqual(rows[0]['group'], 'test-slug')
+        self.assertEqual(len(self.export().splitlines()), 8)
+
+    def test_csv(self):
+        content = self.export(format='csv', author='guest_test_user')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['text'], 'Текст тестовой записи')
+
+    def test_bad_requests(self):
+        url = reverse('posts:export')
+        self.assertEqual(self.authorized_client.get(
+            url, {'since': 'вчера'}).status_code, 400)
+        self.assertEqual(self.authorized_client.get(
+            url, {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.authorized_client.get(
+            url, {'group': 'missing'}).status_code, 404)
+        self.assertEqual(self.guest_client.get(url).status_code, 302)
+
+    def test_chunked_iteration(self):
+        """Посты читаются кусками, каждый кусок - отдельный запрос."""
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(iter_rows(filtered_posts(), chunk_size=3))
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len({row['id'] for row in rows}), 8)
+
+    def test_command_round_trip(self):
+        """Выгрузку команды можно загрузить обратно через import_posts."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.csv')
+            call_command('export_posts', format='csv', group='test-slug',
+                         output=path, chunk_size=2, stderr=StringIO())
+            Post.objects.filter(group=self.group).delete()
+            call_command('import_posts', path, stdout=StringIO(),
+                         stderr=StringIO())
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 8)
+        self.assertTrue(Post.objects.filter(
+            text='Старый пост 0', pub_date__year=2021
+        ))
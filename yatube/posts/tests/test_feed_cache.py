@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from .. import feed_cache
+from .test_models import BaseTest, Group, Post, User
+
+
+class FeedCacheTests(BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'guest_test_user'}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_second_request_hits_cache(self):
+        """Повторный запрос ленты отдает список постов из кэша."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                # Главной не нужен даже COUNT(*): он закэширован
+                with self.assertNumQueries(0 if url == '/' else 1):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+        stats = feed_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (3, 3))
+
+    def test_post_save_invalidates_feeds(self):
+        """Новый и отредактированный пост сразу виден во всех лентах."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        post = Post.objects.create(author=self.user, text='Свежая запись',
+                                   group=self.group)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Свежая запись')
+        post.text = 'Исправленная запись'
+        post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Исправленная запись')
+        post.delete()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotContains(self.guest_client.get(url),
+                                       'Исправленная запись')
+
+    def test_unrelated_group_keeps_cache(self):
+        """Пост в другой группе не сбрасывает кэш этой группы."""
+        group_url = self.urls[1]
+        self.guest_client.get(group_url)
+        other = Group.objects.create(title='Другая', slug='other',
+                                     description='Описание')
+        Post.objects.create(author=User.objects.create_user('other_author'),
+                            text='Чужой пост', group=other)
+        self.guest_client.get(group_url)
+        self.assertEqual(feed_cache.stats()['hits'], 1)
+
+    def test_author_rename_invalidates_feeds(self):
+        for url in self.urls:
+            self.guest_client.get(url)
+        self.user.first_name = 'Иван'
+        self.user.last_name = 'Петров'
+        self.user.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Иван Петров')
+
+    def test_group_slug_change_invalidates_feeds(self):
+        self.guest_client.get(self.urls[0])
+        self.group.slug = 'renamed-slug'
+        self.group.save()
+        self.assertContains(self.guest_client.get(self.urls[0]),
+                            '/group/renamed-slug/')
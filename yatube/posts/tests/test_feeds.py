@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .test_models import BaseTest, Post
+
+
+class SyndicationFeedTests(BaseTest):
+    def setUp(self):
+        cache.clear()
+        self.urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', kwargs={'slug': 'test-slug'}),
+            reverse('posts:group_atom', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile_rss',
+                    kwargs={'username': 'guest_test_user'}),
+            reverse('posts:profile_atom',
+                    kwargs={'username': 'guest_test_user'}),
+        )
+
+    def test_feeds(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('xml', response['Content-Type'])
+                self.assertContains(response, 'Текст тестовой записи')
+                self.assertTrue(response.has_header('ETag'))
+        self.assertContains(self.guest_client.get(self.urls[1]),
+                            'http://www.w3.org/2005/Atom')
+
+    def test_feed_is_cached_and_invalidated(self):
+        """Фид берется из кэша, пока в его ленте не сохранен пост."""
+        url = self.urls[2]
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        self.assertEqual(len(queries), 0)
+
+        post = Post.objects.create(author=self.user, text='Новая запись',
+                                   group=self.group)
+        self.assertContains(self.guest_client.get(url), 'Новая запись')
+        post.delete()
+        self.assertNotContains(self.guest_client.get(url), 'Новая запись')
+
+    def test_conditional_get(self):
+        url = self.urls[4]
+        etag = self.guest_client.get(url)['ETag']
+        self.assertEqual(
+            self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+        Post.objects.create(author=self.user, text='Еще запись')
+        self.assertEqual(
+            self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            200,
+        )
+
+    def test_missing_group(self):
+        response = self.guest_client.get(
+            reverse('posts:group_rss', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_pages_link_feeds(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('posts:index_rss'))
@@ -0,0 +1,125 @@
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetTestMixin
+from core.models import Task
+from core.tasks import run_pending
+
+from ..models import Follow, TimelineEntry
+from ..timeline import TimelinePaginator
+from .test_models import BaseTest, Post, User
+
+
+class FollowTests(QueryBudgetTestMixin, BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def follow(self, author, client=None):
+        return (client or self.reader_client).get(
+            reverse('posts:profile_follow', args=[author.username])
+        )
+
+    def feed(self, client=None):
+        response = (client or self.reader_client).get(
+            reverse('posts:follow_index')
+        )
+        return list(response.context['page_obj'])
+
+    def test_follow_and_unfollow(self):
+        Post.objects.create(author=self.author, text='До подписки')
+        response = self.follow(self.author)
+        self.assertRedirects(response, reverse('posts:profile',
+                                               args=['author']))
+        self.assertEqual(self.author.stats.followers_count, 1)
+        # Старые посты автора попадают в ленту при подписке
+        self.assertEqual([post.text for post in self.feed()],
+                         ['До подписки'])
+
+        self.reader_client.get(reverse('posts:profile_unfollow',
+                                       args=['author']))
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_cannot_follow_self(self):
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_fans_out_to_followers_only(self):
+        self.follow(self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        # Раскладка по лентам - фоновая задача
+        self.assertEqual(self.feed(), [])
+        run_pending()
+        self.assertEqual(self.feed(), [post])
+        self.assertEqual(self.feed(self.authorized_client), [])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1, PAGE_LIMIT=3)
+    def test_large_author_is_pulled_and_merged(self):
+        """Посты автора с большим числом подписчиков не раскладываются,
+        а подмешиваются при чтении в общем порядке ленты."""
+        self.follow(self.author)
+        self.follow(self.star)
+        self.follow(self.star, self.authorized_client)
+        posts = [Post.objects.create(author=author, text=f'Пост {number}')
+                 for number, author in enumerate(
+                     [self.author, self.star] * 4)]
+        run_pending()
+        self.assertFalse(TimelineEntry.objects.filter(
+            author=self.star).exists())
+        expected = posts[::-1]
+
+        paginator = TimelinePaginator(self.reader, 3)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([post for page in pages for post in page], expected)
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(previous), list(pages[-2]))
+        self.assertEqual(self.feed(self.authorized_client),
+                         [post for post in expected
+                          if post.author == self.star][:3])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1)
+    def test_author_back_below_threshold_keeps_pulled_posts(self):
+        """Посты, написанные в режиме pull, не пропадают из лент, когда
+        автор снова опускается до порога."""
+        self.follow(self.star)
+        self.follow(self.star, self.authorized_client)
+        post = Post.objects.create(author=self.star, text='Пост в pull')
+        run_pending()
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.authorized_client.get(reverse('posts:profile_unfollow',
+                                           args=['star']))
+        run_pending()
+        self.assertEqual(self.feed(), [post])
+
+    def test_post_without_followers_enqueues_nothing(self):
+        Post.objects.create(author=self.author, text='Никто не читает')
+        self.assertFalse(Task.objects.filter(
+            name__endswith='fan_out_post').exists())
+        self.follow(self.author)
+        Post.objects.create(author=self.author, text='Есть читатель')
+        self.assertTrue(Task.objects.filter(
+            name__endswith='fan_out_post').exists())
+
+    def test_follow_index_within_query_budget(self):
+        self.follow(self.author)
+        Post.objects.create(author=self.author, text='Пост')
+        run_pending()
+        self.assertWithinQueryBudget(self.reader_client,
+                                     reverse('posts:follow_index'))
+
+    def test_profile_shows_follow_state(self):
+        url = reverse('posts:profile', args=['author'])
+        self.assertContains(self.reader_client.get(url), 'Подписаться')
+        self.follow(self.author)
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'Отписаться')
+        self.assertEqual(response.context['followers_count'], 1)
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetTestMixin
+
+from .. import group_stats
+from .test_models import BaseTest, Group, Post, User
+
+
+def run_commit_hooks(start):
+    """Выполняет колбэки on_commit, добавленные в транзакции теста
+    после первых start."""
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for _, callback in callbacks:
+        callback()
+
+
+@override_settings(GROUP_TOP_AUTHORS=2, GROUP_STATS_TRACKED_AUTHORS=3)
+class GroupIndexTests(QueryBudgetTestMixin, BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [User.objects.create_user(username=f'author_{number}')
+                       for number in range(4)]
+        for author, posts in zip(cls.authors, (4, 3, 2, 1)):
+            for number in range(posts):
+                Post.objects.create(author=author, text=f'Пост {number}',
+                                    group=cls.group)
+        cls.empty = Group.objects.create(title='Пустая группа', slug='empty',
+                                         description='Без постов')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_directory_lists_groups_with_stats(self):
+        response = self.guest_client.get(reverse('posts:group_index'))
+        stats = dict(response.context['groups'])
+        self.assertEqual(stats[self.group]['posts'], 11)
+        self.assertEqual(stats[self.group]['latest'],
+                         self.group.posts.latest('pub_date').pub_date)
+        self.assertEqual(stats[self.group]['top_authors'],
+                         ['author_0', 'author_1'])
+        self.assertEqual(stats[self.empty]['posts'], 0)
+        self.assertContains(response, reverse('posts:profile',
+                                              args=['author_0']))
+
+    def test_stats_come_from_cache(self):
+        url = reverse('posts:group_index')
+        self.assertWithinQueryBudget(self.guest_client, url)
+        # Остались только COUNT и страница групп
+        with self.assertNumQueries(2):
+            self.guest_client.get(url)
+
+    def test_new_post_updates_cached_stats_in_place(self):
+        group_stats.get_stats([self.group.pk])
+        start = len(connection.run_on_commit)
+        post = Post.objects.create(author=self.authors[3], text='Новый',
+                                   group=self.group)
+        run_commit_hooks(start)
+        with self.assertNumQueries(0):
+            stats = group_stats.get_stats([self.group.pk])[self.group.pk]
+        self.assertEqual(stats['posts'], 12)
+        self.assertEqual(stats['latest'], post.pub_date)
+        self.assertEqual(stats, group_stats.compute_stats(
+            [self.group.pk])[self.group.pk] | {'top_authors': ['author_0',
+                                                               'author_1']})
+
+    def test_untracked_author_forces_recount_when_close(self):
+        """Неотслеживаемый автор, который может догнать выводимых,
+        сбрасывает запись вместо неточного обновления."""
+        entry = group_stats.compute_stats([self.group.pk])[self.group.pk]
+        self.assertEqual(entry['floor'], 1)
+        self.assertTrue(group_stats.add_post(entry, 'author_3',
+                                             self.post.pub_date))
+        self.assertFalse(group_stats.add_post(entry, 'author_3',
+                                              self.post.pub_date))
+
+    def test_deleted_post_resets_stats(self):
+        group_stats.get_stats([self.group.pk])
+        self.group.posts.filter(author=self.authors[0]).first().delete()
+        stats = group_stats.get_stats([self.group.pk])[self.group.pk]
+        self.assertEqual(stats['posts'], 10)
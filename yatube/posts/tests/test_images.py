@@ -0,0 +1,83 @@
+import io
+import shutil
+import tempfile
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+from .test_models import BaseTest, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg(size, exif=True):
+    image = Image.new('RGB', size, 'teal')
+    options = {}
+    if exif:
+        metadata = Image.Exif()
+        # Make и Orientation: камера и поворот на 90°
+        metadata[0x010F] = 'Камера'
+        metadata[0x0112] = 6
+        options['exif'] = metadata.tobytes()
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', **options)
+    return SimpleUploadedFile('photo.jpeg', buffer.getvalue(),
+                              content_type='image/jpeg')
+
+
+class ImageForm(forms.ModelForm):
+    class Meta:
+        model = Post
+        fields = ('text', 'image')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIZE=(400, 400))
+class ImagePipelineTests(BaseTest):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_upload_is_downscaled_and_stripped(self):
+        post = Post.objects.create(author=self.user, text='Фото',
+                                   image=jpeg((1600, 1200)))
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(post.image.path) as stored:
+            # Ориентация из EXIF применена до того, как EXIF удален
+            self.assertEqual(stored.size, (300, 400))
+            self.assertFalse(stored.getexif())
+            self.assertNotIn('exif', stored.info)
+
+    def test_small_image_keeps_size(self):
+        post = Post.objects.create(author=self.user, text='Фото',
+                                   image=jpeg((120, 80), exif=False))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (120, 80))
+
+    def test_rejected_before_decoding(self):
+        cases = (
+            ('file_too_large', {'IMAGE_UPLOAD_MAX_BYTES': 100},
+             jpeg((200, 200))),
+            ('too_many_pixels', {'IMAGE_UPLOAD_MAX_PIXELS': 1000},
+             jpeg((200, 200))),
+            ('invalid_format', {'IMAGE_UPLOAD_FORMATS': ('PNG',)},
+             jpeg((20, 20))),
+        )
+        for code, limits, upload in cases:
+            with self.subTest(code=code), override_settings(**limits):
+                form = ImageForm({'text': 'Фото'}, {'image': upload})
+                self.assertFalse(form.is_valid())
+                self.assertEqual(form.errors.as_data()['image'][0].code,
+                                 code)
+
+    def test_valid_upload_passes_form(self):
+        form = ImageForm({'text': 'Фото'},
+                         {'image': jpeg((500, 100), exif=False)})
+        self.assertTrue(form.is_valid(), form.errors)
+        form.instance.author = self.user
+        post = form.save()
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (400, 80))
@@ -0,0 +1,140 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import AuthorStats, ImportCheckpoint, PostTerm
+from .test_models import BaseTest, Group, Post, User
+
+
+class ImportPostsTests(BaseTest):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def jsonl(self, records):
+        return self.write('posts.jsonl', ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records
+        ))
+
+    def import_posts(self, path, **options):
+        out = StringIO()
+        call_command('import_posts', path, stdout=out, stderr=StringIO(),
+                     **options)
+        return out.getvalue()
+
+    def test_import_jsonl(self):
+        """Загрузка создает авторов и группы, сохраняет даты и обновляет
+        счетчики, индекс и ленты."""
+        self.guest_client.get(reverse('posts:index'))
+        path = self.jsonl([
+            {'text': 'Первый импорт', 'author': 'guest_test_user',
+             'group': 'test-slug', 'pub_date': '2015-05-01T10:00:00'},
+            {'text': 'Второй импорт', 'author': 'imported_author',
+             'group': 'imported-group'},
+            {'text': 'Третий импорт', 'author': 'imported_author'},
+        ])
+        self.import_posts(path, batch_size=2)
+
+        author = User.objects.get(username='imported_author')
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(author.stats.posts_count, 2)
+        self.assertEqual(AuthorStats.objects.get(author=self.user)
+                         .posts_count, 2)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 2)
+        self.assertEqual(Group.objects.get(slug='imported-group')
+                         .posts_count, 1)
+        first = Post.objects.get(text='Первый импорт')
+        self.assertEqual(first.pub_date.year, 2015)
+        self.assertTrue(PostTerm.objects.filter(post=first, term='импорт'))
+        self.assertContains(self.guest_client.get(reverse('posts:index')),
+                            'Третий импорт')
+
+    def test_import_csv(self):
+        path = self.write(
+            'posts.csv',
+            'text,author,group,pub_date\n'
+            '"Пост\nв две строки",guest_test_user,,\n'
+            'Еще пост,guest_test_user,test-slug,2020-01-01T00:00:00+03:00\n'
+        )
+        self.import_posts(path, batch_size=1)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 3)
+        self.assertTrue(Post.objects.filter(text='Пост\nв две строки'))
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск продолжает с первой незагруженной записи."""
+        path = self.jsonl([{'text': f'Пост {number}',
+                            'author': 'guest_test_user'}
+                           for number in range(5)])
+        self.import_posts(path, batch_size=2, limit=3)
+        self.assertEqual(Post.objects.filter(text__startswith='Пост ')
+                         .count(), 3)
+        self.assertEqual(ImportCheckpoint.objects.get().imported, 3)
+        self.import_posts(path, batch_size=2)
+        self.import_posts(path, batch_size=2)
+        self.assertEqual(
+            sorted(Post.objects.filter(text__startswith='Пост ')
+                   .values_list('text', flat=True)),
+            [f'Пост {number}' for number in range(5)],
+        )
+        self.import_posts(path, restart=True)
+        self.assertEqual(Post.objects.filter(text__startswith='Пост ')
+                         .count(), 10)
+
+    def test_bad_records_are_skipped(self):
+        path = self.write('posts.jsonl', '\n'.join((
+            '{"text": "Хорошая запись", "author": "guest_test_user"}',
+            'не JSON',
+            '{"text": "", "author": "guest_test_user"}',
+            '{"text": "Без группы", "author": "guest_test_user", '
+            '"group": "unknown"}',
+            '{"text": "Плохая дата", "author": "guest_test_user", '
+            '"pub_date": "вчера"}',
+            '{"text": "Нет такого дня", "author": "guest_test_user", '
+            '"pub_date": "2020-13-45T00:00:00"}',
+            '{"text": 5, "author": "guest_test_user"}',
+            '{"text": "Автор - список", "author": ["guest_test_user"]}',
+            '{"text": "Группа - объект", "author": "guest_test_user", '
+            '"group": {"slug": "test-slug"}}',
+        )))
+        out = self.import_posts(path, no_create_groups=True)
+        self.assertIn('Загружено 1, пропущено 8', out)
+        self.assertFalse(Group.objects.filter(slug='unknown'))
+
+    def test_posts_created_during_import_are_not_reindexed(self):
+        """Пост с сайта между чтением last_pk и вставкой пачки уже
+        проиндексирован сигналом - пачка не индексирует его повторно."""
+        bulk_create = Post.objects.bulk_create
+
+        def create_post_first(posts, *args, **kwargs):
+            # keep_pub_date() отключает auto_now_add на время загрузки
+            Post.objects.create(author=self.user, text='Пост с сайта',
+                                pub_date=timezone.now())
+            return bulk_create(posts, *args, **kwargs)
+
+        path = self.jsonl([{'text': 'Импортированный пост',
+                            'author': 'guest_test_user'}])
+        with mock.patch.object(Post.objects, 'bulk_create',
+                               side_effect=create_post_first):
+            out = self.import_posts(path)
+        self.assertIn('Загружено 1, пропущено 0', out)
+        web_post = Post.objects.get(text='Пост с сайта')
+        self.assertEqual(PostTerm.objects.filter(post=web_post,
+                                                 term='сайта').count(), 1)
+        self.assertTrue(PostTerm.objects.filter(
+            post__text='Импортированный пост', term='импортированный'
+        ))
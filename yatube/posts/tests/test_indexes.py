@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..pagination import encode_cursor, NEXT
+from .test_models import BaseTest, Post
+
+
+def explain_query_plan(sql):
+    """Строки EXPLAIN QUERY PLAN (колонка detail) для запроса SQLite."""
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class FeedIndexesTests(BaseTest):
+    """Запросы лент читают posts_post по индексу и без временной
+    сортировки (USE TEMP B-TREE FOR ORDER BY)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(12):
+            Post.objects.create(author=cls.user, text=f'Пост {number}',
+                                group=cls.group)
+
+    def feed_queries(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url, data)
+        return [query['sql'] for query in queries
+                if query['sql'].startswith('SELECT')
+                and 'FROM "posts_post"' in query['sql']]
+
+    def test_feed_queries_use_indexes(self):
+        newest = Post.objects.first()
+        cursor = encode_cursor(NEXT, newest.pub_date, newest.pk)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'guest_test_user'}),
+        )
+        for url in urls:
+            for data in (None, {'page': 2}, {'cursor': cursor}):
+                sql_list = self.feed_queries(url, data)
+                self.assertTrue(sql_list)
+                for sql in sql_list:
+                    with self.subTest(url=url, data=data, sql=sql):
+                        plan = explain_query_plan(sql)
+                        post_steps = [step for step in plan
+                                      if 'posts_post' in step]
+                        self.assertTrue(post_steps, plan)
+                        for step in post_steps:
+                            # SEARCH без индекса - поиск по rowid (MAX(id))
+                            self.assertTrue(
+                                'INDEX' in step or step.startswith('SEARCH'),
+                                plan
+                            )
+                        self.assertFalse(
+                            [step for step in plan if 'TEMP B-TREE' in step],
+                            plan
+                        )
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 
 from ..models import Group, Post
@@ -10,6 +11,8 @@ class BaseTest(TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
+        # Кэш не откатывается вместе с тестовой БД
+        cache.clear()
 
         cls.guest_client = Client()
         cls.user = User.objects.create_user(username='guest_test_user')
@@ -0,0 +1,151 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from ..pagination import (CursorPaginator, decode_cursor, encode_cursor,
+                          FeedPaginator, NEXT)
+from .test_models import BaseTest, Post
+
+
+class CursorPaginationTests(BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Вместе с постом из BaseTest получится 25 постов
+        for number in range(24):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {number}',
+                group=cls.group,
+            )
+
+    def test_cursor_round_trip(self):
+        """Курсор кодирует и раскодирует позицию без потерь."""
+        token = encode_cursor(NEXT, self.post.pub_date, self.post.pk)
+        self.assertEqual(decode_cursor(token),
+                         (NEXT, self.post.pub_date, self.post.pk))
+
+    def test_cursor_pages_cover_feed_once(self):
+        """Проход по курсорам вперед и назад повторяет порядок ленты."""
+        expected = list(Post.objects.values_list('pk', flat=True))
+        paginator = CursorPaginator(Post.objects.all(), settings.PAGE_LIMIT)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        seen = [post.pk for page in pages for post in page]
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        first = paginator.page(previous.previous_cursor)
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertFalse(first.has_previous())
+
+    def test_views_accept_cursor(self):
+        """Ленты отдают курсорную страницу по ?cursor=."""
+        newest = Post.objects.first()
+        cursor = encode_cursor(NEXT, newest.pub_date, newest.pk)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'guest_test_user'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {'cursor': cursor})
+                self.assertTrue(response.context['cursor_mode'])
+                self.assertEqual(len(response.context['page_obj']),
+                                 settings.PAGE_LIMIT)
+                self.assertNotIn(newest, response.context['page_obj'])
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        response = self.guest_client.get(reverse('posts:index'),
+                                         {'cursor': 'не-курсор'})
+        self.assertEqual(list(response.context['page_obj']),
+                         list(Post.objects.all()[:settings.PAGE_LIMIT]))
+
+    @override_settings(PAGE_CURSOR_DEPTH=2)
+    def test_numbered_page_links_to_cursor_after_depth(self):
+        """После PAGE_CURSOR_DEPTH ссылка "Следующая" ведет на курсор."""
+        first = self.guest_client.get(reverse('posts:index'))
+        self.assertIsNone(first.context['page_obj'].next_cursor)
+        second = self.guest_client.get(reverse('posts:index'), {'page': 2})
+        cursor = second.context['page_obj'].next_cursor
+        self.assertContains(second, f'?cursor={cursor}')
+        third = self.guest_client.get(reverse('posts:index'),
+                                      {'cursor': cursor})
+        numbered = self.guest_client.get(reverse('posts:index'),
+                                         {'page': 3})
+        self.assertEqual(list(third.context['page_obj']),
+                         list(numbered.context['page_obj']))
+
+
+class FeedPaginatorTests(BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(59):
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_window(self):
+        """Шаблон выводит только окно номеров вокруг текущей страницы."""
+        paginator = FeedPaginator(Post.objects.all(), 5)
+        self.assertEqual(list(paginator.page(1).page_window), [1, 2, 3])
+        page = paginator.page(6)
+        self.assertEqual(list(page.page_window), [4, 5, 6, 7, 8])
+        self.assertTrue(page.has_pages_before_window())
+        self.assertTrue(page.has_pages_after_window())
+        self.assertFalse(paginator.page(12).has_pages_after_window())
+
+    def test_count_is_cached(self):
+        """Число постов по count_key считается один раз."""
+        with self.assertNumQueries(1):
+            FeedPaginator(Post.objects.all(), 10, count_key='count').count
+        with self.assertNumQueries(0):
+            count = FeedPaginator(Post.objects.all(), 10,
+                                  count_key='count').count
+        self.assertEqual(count, 60)
+
+    def test_index_count_follows_new_posts(self):
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.create(author=self.user, text='Еще пост')
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response.context['paginator'].count, 61)
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=10)
+    def test_estimated_count(self):
+        """Для большой таблицы число постов оценивается, а ссылки на
+        последнюю страницу нет."""
+        Post.objects.filter(pk__lt=10).delete()
+        response = self.guest_client.get(reverse('posts:index'))
+        paginator = response.context['paginator']
+        self.assertTrue(paginator.estimated)
+        self.assertEqual(paginator.count, Post.objects.latest('pk').pk)
+        self.assertNotContains(response, 'Последняя')
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=10, PAGE_CURSOR_DEPTH=2)
+    def test_page_past_overestimated_end(self):
+        """Страница за реальным концом ленты при завышенной оценке ведет
+        на последнюю страницу, а не падает."""
+        last_pk = Post.objects.latest('pk').pk
+        Post.objects.filter(pk__lte=last_pk - 20).delete()
+        response = self.guest_client.get(reverse('posts:index'),
+                                         {'page': 3})
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page_obj']
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page), 10)
+        self.assertFalse(response.context['paginator'].estimated)
+        self.assertIsNone(page.next_cursor)
+
+    def test_small_table_is_counted_with_one_query(self):
+        FeedPaginator(Post.objects.all(), 10, estimate=True).count
+        with self.assertNumQueries(1):
+            count = FeedPaginator(Post.objects.all(), 10,
+                                  estimate=True).count
+        self.assertEqual(count, 60)
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from ..models import PostTerm
+from ..search_index import matching_post_ids, ranked_posts
+from .test_models import BaseTest, Post, User
+
+
+class PostSearchTests(BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rare = Post.objects.create(
+            author=cls.user, text='Ёжик в тумане, ежик и еще раз ежик')
+        cls.common = Post.objects.create(
+            author=cls.user, text='Один ежик в тумане')
+        cls.other = Post.objects.create(
+            author=cls.user, text='Лошадка в тумане')
+
+    def found(self, query):
+        return [row['post'] for row in ranked_posts(query)]
+
+    def test_ranking_and_all_words(self):
+        """Находятся посты со всеми словами запроса, частые выше."""
+        self.assertEqual(self.found('ежик'), [self.rare.pk, self.common.pk])
+        self.assertEqual(self.found('ЕЖИК туман'), [])
+        self.assertEqual(self.found('ежик тумане'),
+                         [self.rare.pk, self.common.pk])
+        self.assertEqual(self.found('ежик лошадка'), [])
+        self.assertEqual(self.found(''), [])
+
+    def test_index_follows_edit_and_delete(self):
+        self.other.text = 'Лошадка и ежик'
+        self.other.save()
+        self.assertIn(self.other.pk, self.found('ежик'))
+        self.assertEqual(self.found('тумане лошадка'), [])
+        self.other.delete()
+        self.assertFalse(PostTerm.objects.filter(post_id=self.other.pk))
+
+    def test_rebuild_command(self):
+        PostTerm.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('4', out.getvalue())
+        self.assertEqual(self.found('ежик'), [self.rare.pk, self.common.pk])
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты с паджинатором,
+        ссылки которого сохраняют запрос."""
+        for number in range(12):
+            Post.objects.create(author=self.user, text=f'Кактус {number}')
+        response = self.guest_client.get(reverse('posts:search'),
+                                         {'q': 'кактус'})
+        self.assertEqual(response.context['paginator'].count, 12)
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertContains(response, '?q=%D0%BA%D0%B0%D0%BA%D1%82%D1%83%D1%81'
+                                      '&amp;page=2')
+        second = self.guest_client.get(reverse('posts:search'),
+                                       {'q': 'кактус', 'page': 2})
+        self.assertEqual(len(second.context['page_obj']), 2)
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:posts_post_changelist'),
+                                   {'q': 'ежик'})
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            set(Post.objects.filter(pk__in=matching_post_ids('ежик'))),
+        )
+        self.assertEqual(len(response.context['cl'].result_list), 2)
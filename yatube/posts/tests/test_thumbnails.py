@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetTestMixin
+
+from .. import thumbnails
+from .test_models import BaseTest, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(QueryBudgetTestMixin, BaseTest):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, text='С картинкой'):
+        return Post.objects.create(
+            author=self.user, text=text, group=self.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+
+    def test_placeholder_until_thumbnail_is_generated(self):
+        """Пока миниатюра не создана, страницы показывают заглушку."""
+        post = self.create_post()
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    settings.THUMBNAIL_PLACEHOLDER)
+
+        thumbnails.generate_post_thumbnails(post.pk)
+        post.refresh_from_db()
+        thumbnail = thumbnails.thumbnail_url(post)
+        self.assertIsNotNone(thumbnail)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, thumbnail)
+                self.assertNotContains(response,
+                                       settings.THUMBNAIL_PLACEHOLDER)
+
+    def test_thumbnail_urls_need_no_queries(self):
+        """URL готовых миниатюр строятся без запроса на каждую картинку."""
+        for number in range(10):
+            post = self.create_post(f'Картинка {number}')
+            thumbnails.generate_post_thumbnails(post.pk)
+        cache.clear()
+        response = self.assertWithinQueryBudget(self.guest_client,
+                                                reverse('posts:index'))
+        self.assertNotContains(response, settings.THUMBNAIL_PLACEHOLDER)
+
+    def test_failed_thumbnail_is_not_marked_ready(self):
+        post = self.create_post()
+        Post.objects.filter(pk=post.pk).update(image='posts/missing.gif')
+        with self.assertRaises(RuntimeError):
+            thumbnails.generate_post_thumbnails(post.pk)
+        post.refresh_from_db()
+        self.assertIsNone(thumbnails.thumbnail_url(post))
+
+    def test_single_flight_runs_once(self):
+        """Параллельные вызовы с одним ключом выполняют работу один раз."""
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'готово'
+
+        results = []
+        owner = threading.Thread(target=lambda: results.append(
+            thumbnails.single_flight('key', work)))
+        owner.start()
+        started.wait(5)
+        waiters = [threading.Thread(target=lambda: results.append(
+            thumbnails.single_flight('key', work))) for _ in range(3)]
+        for thread in waiters:
+            thread.start()
+        release.set()
+        for thread in [owner, *waiters]:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['готово'] * 4)
@@ -2,6 +2,8 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from core.query_budget import QueryBudgetTestMixin
+
 # from tests.fixtures.fixture_data import group
 # from tests.fixtures.fixture_user import user
 
@@ -10,7 +12,7 @@ from .test_models import BaseTest, Group, Post
 User = get_user_model()
 
 
-class PostsViewsTests(BaseTest):
+class PostsViewsTests(QueryBudgetTestMixin, BaseTest):
 
     @classmethod
     def setUpClass(cls):
@@ -162,3 +164,25 @@ class PostsViewsTests(BaseTest):
             reverse('posts:group_list',
                     kwargs={'slug': 'second_test-slug'}) + '?page=2')
         self.assertEqual(len(response.context['page_obj'], ), 0)
+
+    # Проверяем, что ленты укладываются в бюджет SQL-запросов
+    def test_pages_within_query_budget(self):
+        """Число запросов на страницу не зависит от числа постов."""
+        Post.objects.create(
+            author=User.objects.create_user(username='second_author'),
+            text='Пост другого автора',
+            group=Group.objects.create(title='Вторая группа',
+                                       slug='second-slug',
+                                       description='Описание'),
+        )
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile',
+                    kwargs={'username': 'guest_test_user'}),
+            reverse('posts:post_detail', kwargs={'post_id': 1}),
+        )
+        for client in (self.guest_client, self.authorized_client):
+            for url in urls:
+                with self.subTest(url=url):
+                    self.assertWithinQueryBudget(client, url)
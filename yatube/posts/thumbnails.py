@@ -0,0 +1,131 @@
+"""Миниатюры картинок постов, созданные вне запроса.
+
+После сохранения поста с картинкой миниатюры всех размеров из
+THUMBNAIL_GEOMETRIES создает фоновая задача (core.tasks) и записывает
+в Post.thumbnails_for имя картинки. Шаблоны (post_thumbnail_url) по этой
+отметке строят URL готовой миниатюры без запросов к KV-хранилищу sorl,
+а пока ее нет, показывают заглушку.
+"""
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.metrics import THUMBNAIL_SECONDS
+from core.tasks import task
+
+from . import feed_cache
+from .models import Post
+
+# Сколько секунд другой процесс считается занятым генерацией миниатюры
+LOCK_TIMEOUT = 5 * 60
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    def thumbnail_file(self, file_, geometry_string, options):
+        """ImageFile миниатюры с теми же именем и опциями, что у sorl."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+backend = PostThumbnailBackend()
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def single_flight(key, func):
+    """Вызывает func не более одного раза одновременно для ключа key.
+
+    Параллельные вызовы с тем же ключом в этом процессе ждут результата
+    первого, а между процессами генерацию разделяет блокировка в кэше.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result()
+    try:
+        if not cache.add(f'thumbnail-lock:{key}', 1, LOCK_TIMEOUT):
+            result = None
+        else:
+            try:
+                result = func()
+            finally:
+                cache.delete(f'thumbnail-lock:{key}')
+        future.set_result(result)
+        return result
+    except BaseException as error:
+        future.set_exception(error)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+
+
+def thumbnails_ready(post):
+    return bool(post.image) and post.thumbnails_for == post.image.name
+
+
+def thumbnail_url(post, size='feed'):
+    """URL готовой миниатюры картинки поста или None."""
+    if not thumbnails_ready(post):
+        return None
+    geometry, options = settings.THUMBNAIL_GEOMETRIES[size]
+    return backend.thumbnail_file(post.image, geometry, dict(options)).url
+
+
+def generate_thumbnails(image):
+    """Создает все миниатюры картинки, если их еще нет; возвращает True,
+    если все они готовы."""
+    ready = True
+    for geometry, options in settings.THUMBNAIL_GEOMETRIES.values():
+        thumbnail = backend.thumbnail_file(image, geometry, dict(options))
+        single_flight(thumbnail.name, lambda: default.backend.get_thumbnail(
+            image, geometry, **options
+        ))
+        # sorl не бросает исключений: о сбое говорит только отсутствие файла
+        ready = ready and thumbnail.exists()
+    return ready
+
+
+@task()
+def generate_post_thumbnails(post_id):
+    post = Post.objects.for_feed().filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    with THUMBNAIL_SECONDS.time():
+        ready = generate_thumbnails(post.image)
+    if not ready:
+        # Задача повторится, а пока страницы показывают заглушку
+        raise RuntimeError(f'Миниатюры картинки {post.image.name} не созданы')
+    # Кэш лент и карточка поста могли сохранить заглушку вместо картинки.
+    # Картинку могли заменить, пока создавались миниатюры старой
+    Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails_for=post.image.name, updated=timezone.now()
+    )
+    feed_cache.touch(*feed_cache.post_scopes(post))
+
+
+def schedule_post_thumbnails(post):
+    """Ставит создание миниатюр в очередь вместе с сохранением поста."""
+    if post.image and not thumbnails_ready(post):
+        generate_post_thumbnails.enqueue(post.pk)
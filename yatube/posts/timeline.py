@@ -0,0 +1,164 @@
+"""Персональная лента подписок (fan-out on write).
+
+Новый пост раскладывается в ленты подписчиков автора фоновой задачей
+(fan_out_post): записи TimelineEntry вставляются пачками по
+TIMELINE_BATCH_SIZE. Лента читается
+по одному индексу (user, pub_date, post) без перебора всех подписок.
+
+У авторов, чьих подписчиков больше TIMELINE_FANOUT_MAX_FOLLOWERS, пост
+никуда не раскладывается: слишком дорогая запись. Такие посты лента
+подмешивает при чтении (pull) и сливает с материализованной частью по
+(pub_date, id). Автор, переросший порог, подмешивается целиком, поэтому
+его старые записи в лентах не мешают: дубли отбрасываются при слиянии.
+Автор, снова опустившийся до порога, больше не подмешивается: его
+последние посты раскладываются по лентам подписчиков задачей
+refill_author, иначе посты, написанные в режиме pull, пропали бы.
+"""
+from django.conf import settings
+
+from core.tasks import task
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .pagination import (after, before, CursorPage, decode_cursor,
+                         InvalidCursor, NEXT, PREVIOUS)
+
+
+def fans_out(followers_count):
+    return followers_count <= settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def has_followers(author_id):
+    return AuthorStats.objects.filter(author_id=author_id,
+                                      followers_count__gt=0).exists()
+
+
+def fan_out(posts):
+    """Раскладывает посты по лентам подписчиков их авторов."""
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    batch_size = settings.TIMELINE_BATCH_SIZE
+    for author_id, author_posts in by_author.items():
+        followers = Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True
+        )
+        if not fans_out(followers.count()):
+            continue
+        batch = []
+        for user_id in followers.order_by().iterator(chunk_size=batch_size):
+            batch.extend(
+                TimelineEntry(user_id=user_id, post_id=post.pk,
+                              author_id=author_id, pub_date=post.pub_date)
+                for post in author_posts
+            )
+            if len(batch) >= batch_size:
+                TimelineEntry.objects.bulk_create(batch,
+                                                  ignore_conflicts=True)
+                batch = []
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+@task()
+def fan_out_post(post_id):
+    """Фоновая задача: раскладывает новый пост по лентам подписчиков."""
+    fan_out(Post.objects.filter(pk=post_id).only('pk', 'author', 'pub_date'))
+
+
+@task()
+def refill_author(author_id):
+    """Фоновая задача: раскладывает последние посты автора, вернувшегося
+    от pull к раскладке, по лентам всех его подписчиков."""
+    fan_out(Post.objects.filter(author_id=author_id).only(
+        'pk', 'author', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL])
+
+
+def follower_left(author_id):
+    """После отписки: если автор опустился до порога, его посты, которые
+    подмешивались при чтении, нужно разложить по лентам."""
+    count = Follow.objects.filter(author_id=author_id).count()
+    if fans_out(count) and not fans_out(count + 1):
+        refill_author.enqueue(author_id)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                       pub_date=pub_date) for pk, pub_date in posts],
+        ignore_conflicts=True,
+    )
+
+
+def forget_author(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id,
+                                 author_id=author_id).delete()
+
+
+def pulled_authors(user):
+    """Авторы из подписок, чьи посты подмешиваются при чтении."""
+    return list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=(
+            settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+        ),
+    ).values_list('author_id', flat=True))
+
+
+class TimelinePaginator:
+    """Курсорная паджинация ленты подписок, совместимая с CursorPaginator.
+
+    Страница собирается из двух выборок по per_page + 1 строк -
+    материализованной ленты и постов авторов с pull - и их слияния.
+    """
+
+    def __init__(self, user, per_page):
+        self.user = user
+        self.per_page = per_page
+        self.pulled = pulled_authors(user)
+
+    def positions(self, direction=None, pub_date=None, pk=None):
+        """(pub_date, id) постов после курсора в порядке чтения: вглубь
+        ленты для NEXT и без курсора, к ее началу для PREVIOUS."""
+        entries = TimelineEntry.objects.filter(user=self.user)
+        posts = Post.objects.filter(author__in=self.pulled)
+        if direction is not None:
+            condition = after if direction == NEXT else before
+            entries = entries.filter(condition(pub_date, pk, 'post_id'))
+            posts = posts.filter(condition(pub_date, pk))
+        backward = direction == PREVIOUS
+        sign = '' if backward else '-'
+        limit = self.per_page + 1
+        rows = list(entries.order_by(
+            f'{sign}pub_date', f'{sign}post_id'
+        ).values_list('pub_date', 'post_id')[:limit])
+        if self.pulled:
+            rows += posts.order_by(f'{sign}pub_date', f'{sign}pk').values_list(
+                'pub_date', 'pk'
+            )[:limit]
+        return sorted(set(rows), reverse=not backward)[:limit]
+
+    def page(self, cursor=None):
+        direction = pub_date = pk = None
+        if cursor:
+            direction, pub_date, pk = decode_cursor(cursor)
+        rows = self.positions(direction, pub_date, pk)
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, direction == NEXT
+        posts = Post.objects.for_feed().in_bulk([pk for _, pk in rows])
+        return CursorPage([posts[pk] for _, pk in rows if pk in posts], self,
+                          has_next=has_next, has_previous=has_previous)
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
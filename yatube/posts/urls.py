@@ -1,17 +1,36 @@
 from django.urls import path
 
 from . import views
+from .feeds import feed_view
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('group/', views.group_index, name='group_index'),
     path(
         'group/<slug:slug>/',
         views.group_posts, name='group_list'
     ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/follow/', views.profile_follow,
+         name='profile_follow'),
+    path('profile/<str:username>/unfollow/', views.profile_unfollow,
+         name='profile_unfollow'),
+    path('follow/', views.follow_index, name='follow_index'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export_posts, name='export'),
+    path('feeds/rss/', feed_view('index', 'rss'), name='index_rss'),
+    path('feeds/atom/', feed_view('index', 'atom'), name='index_atom'),
+    path('group/<slug:slug>/rss/', feed_view('group', 'rss'),
+         name='group_rss'),
+    path('group/<slug:slug>/atom/', feed_view('group', 'atom'),
+         name='group_atom'),
+    path('profile/<str:username>/rss/', feed_view('profile', 'rss'),
+         name='profile_rss'),
+    path('profile/<str:username>/atom/', feed_view('profile', 'atom'),
+         name='profile_atom'),
     path('create/', views.post_create, name='create_post'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
 ]
@@ -1,53 +1,143 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .forms import PostForm
-from .models import Group, Post
-from django.conf import settings
-
+from core.query_budget import query_budget
+from core.ratelimit import ratelimit
 
-# Паджинация
-def pagination(queryset, request):
-    paginator = Paginator(queryset, settings.PAGE_LIMIT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return {'paginator': paginator,
-            'page_number': page_number,
-            'page_obj': page_obj,
-            }
-
-
-# Главная страница
+from . import export, feed_cache, group_stats, search_index, timeline
+from .conditional import feed_condition
+from .counters import author_followers_count, author_posts_count
+from .forms import PostForm
+from .models import Follow, Group, Post
+from .pagination import FeedPaginator, pagination
+
+
+def post_detail_scopes(post_id):
+    row = Post.objects.filter(pk=post_id).values_list(
+        'author__username', 'group__slug'
+    ).first()
+    if row is None:
+        return None
+    username, slug = row
+    # Любая правка поста, его автора и счетчика постов обновляет профиль,
+    # а заголовок группы на странице поста - ленту группы
+    scopes = {feed_cache.profile_scope(username)}
+    if slug is not None:
+        scopes.add(feed_cache.group_scope(slug))
+    return scopes
+
+
+# Главная страница. Бюджет на холодный кэш: сессия, пользователь, два
+# запроса на число постов (max(id), затем COUNT(*) или sqlite_stat1)
+# и страница постов
+@query_budget(5)
+@feed_condition(lambda: {feed_cache.INDEX})
 def index(request):
-    context = pagination(Post.objects.all(), request)
+    context = pagination(Post.objects.for_feed(), request,
+                         count_key=feed_cache.count_key(feed_cache.INDEX),
+                         estimate=True)
+    context['feed_cache_key'] = feed_cache.fragment_key(
+        feed_cache.INDEX, context['position']
+    )
     return render(request, 'posts/index.html', context)
 
 
 # Страница группы
+@query_budget(4)
+@feed_condition(lambda slug: {feed_cache.group_scope(slug)})
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    context = pagination(group.posts.all(), request)
+    context = pagination(group.posts.for_feed(), request,
+                         count=group.posts_count)
+    context['feed_cache_key'] = feed_cache.fragment_key(
+        feed_cache.group_scope(slug), context['position']
+    )
     context['group'] = group
     return render(request, 'posts/group_list.html', context)
 
 
+# Каталог групп со статистикой. Бюджет на холодный кэш: сессия,
+# пользователь, число групп, страница групп и их статистика одним запросом
+@query_budget(5)
+def group_index(request):
+    paginator = FeedPaginator(Group.objects.only('pk', 'title', 'slug'),
+                              settings.GROUP_INDEX_PAGE_SIZE,
+                              allow_cursor=False)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    stats = group_stats.get_stats([group.pk for group in page_obj])
+    context = {
+        'paginator': paginator,
+        'page_obj': page_obj,
+        'groups': [(group, stats[group.pk]) for group in page_obj],
+        'cursor_mode': False,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 # Страница профиля пользователя
+@query_budget(5)
+@feed_condition(lambda username: {feed_cache.profile_scope(username)})
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts_count = author.posts.count()
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    posts_count = author_posts_count(author)
     username = author.username
-    context = pagination(author.posts.all(), request)
+    context = pagination(author.posts.for_feed(), request,
+                         count=posts_count)
+    context['feed_cache_key'] = feed_cache.fragment_key(
+        feed_cache.profile_scope(author.username), context['position']
+    )
     context['author'] = author
     context['posts_count'] = posts_count
+    context['followers_count'] = author_followers_count(author)
+    context['following'] = (
+        request.user.is_authenticated
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
     context['username'] = username
     return render(request, 'posts/profile.html', context)
 
 
+# Лента авторов, на которых подписан пользователь
+@query_budget(4)
+@login_required
+def follow_index(request):
+    paginator = timeline.TimelinePaginator(request.user, settings.PAGE_LIMIT)
+    context = {
+        'paginator': paginator,
+        'page_obj': paginator.get_page(request.GET.get('cursor')),
+        'cursor_mode': True,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    follow = Follow.objects.filter(user=request.user, author=author).first()
+    if follow is not None:
+        follow.delete()
+    return redirect('posts:profile', username=username)
+
+
+@query_budget(4)
+@feed_condition(post_detail_scopes)
 def post_detail(request, post_id):
-    post_card = get_object_or_404(Post, pk=post_id)
-    posts_count = post_card.author.posts.count()
+    post_card = get_object_or_404(
+        Post.objects.for_feed().select_related('author__stats'), pk=post_id
+    )
+    posts_count = author_posts_count(post_card.author)
     context = {
         'post_card': post_card,
         'posts_count': posts_count,
@@ -55,7 +145,59 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+# Поиск по постам
+@query_budget(7)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = FeedPaginator(search_index.ranked_posts(query),
+                              settings.PAGE_LIMIT, allow_cursor=False)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = search_index.posts_in_order(page_obj.object_list)
+    context = {
+        'query': query,
+        'paginator': paginator,
+        'page_obj': page_obj,
+        'cursor_mode': False,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+# Выгрузка постов потоком: ?format=ndjson|csv&group=&author=&since=&until=
+@login_required
+def export_posts(request):
+    file_format = request.GET.get('format', 'ndjson')
+    if file_format not in export.FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    filters = {}
+    if request.GET.get('group'):
+        filters['group'] = get_object_or_404(Group,
+                                             slug=request.GET['group'])
+    if request.GET.get('author'):
+        filters['author'] = get_object_or_404(User,
+                                              username=request.GET['author'])
+    try:
+        for name in ('since', 'until'):
+            if request.GET.get(name):
+                filters[name] = export.parse_moment(request.GET[name])
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    rows = export.iter_rows(export.filtered_posts(**filters))
+    response = StreamingHttpResponse(export.render(file_format, rows),
+                                     content_type=export.FORMATS[file_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{file_format}"'
+    )
+    return response
+
+
+# Создание поста. Бюджет на первый пост автора в группе: сессия,
+# пользователь, группы формы и проверка группы, BEGIN и INSERT поста,
+# счетчики автора (8: UPDATE мимо, COUNT и update_or_create) и группы (1),
+# slug групп для версий лент, поисковый индекс (DELETE и INSERT слов) и
+# проверка подписчиков автора для раскладки по лентам
+@query_budget(19)
 @login_required
+@ratelimit('post_create')
 def post_create(request):
     form = PostForm(request.POST or None, request.FILES)
     if request.method == 'POST':
@@ -69,9 +211,14 @@ def post_create(request):
     return render(request, 'posts/create_post.html', context)
 
 
+# Редактирование поста. Бюджет на смену группы: сессия, пользователь,
+# пост, группы формы и проверка группы, BEGIN и UPDATE поста, счетчики
+# прежней и новой группы, slug групп для версий лент и поисковый индекс
+@query_budget(12)
 @login_required
+@ratelimit('post_edit')
 def post_edit(request, post_id: int):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
     form = PostForm(request.POST or None,
                     files=request.FILES or None,
                     instance=post)
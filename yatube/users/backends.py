@@ -0,0 +1,60 @@
+"""Аутентификация с кэшем пользователя.
+
+CachedAuthenticationMiddleware (middleware.py) на каждом запросе берет
+пользователя сессии из кэша (session_user), а при промахе - через бэкенд
+CachedModelBackend, который кладет его в кэш на USER_CACHE_TIMEOUT
+секунд. Запись сбрасывается при сохранении и удалении пользователя
+(в том числе при смене пароля) и при выходе (signals.py).
+
+Сигналы сбрасывают кэш только там, где он общий. Поэтому закэшированный
+пользователь отдается, только если хэш его пароля совпадает с хэшем
+в сессии: сессия, созданная после смены пароля в другом процессе, не
+получит пользователя со старым паролем, а перечитает его из базы. Старые
+сессии в других процессах выходят сразу только с общим кэшем (CACHES).
+"""
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+
+def user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
+
+
+BACKEND = f'{CachedModelBackend.__module__}.{CachedModelBackend.__name__}'
+
+
+def session_user(session):
+    """Закэшированный пользователь сессии или None, если его нужно
+    прочитать из базы."""
+    user_id = session.get(SESSION_KEY)
+    if user_id is None or session.get(BACKEND_SESSION_KEY) != BACKEND:
+        return None
+    user = cache.get(user_key(user_id))
+    if user is None:
+        return None
+    if constant_time_compare(session.get(HASH_SESSION_KEY, ''),
+                             user.get_session_auth_hash()):
+        return user
+    # Пароль сменили (возможно, в другом процессе): запись устарела или
+    # устарела сессия - проверка в auth.get_user рассудит по базе
+    forget_user(user_id)
+    return None
@@ -0,0 +1,20 @@
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from .backends import session_user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = (session_user(request.session)
+                                or auth.get_user(request))
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, которая берет пользователя из кэша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
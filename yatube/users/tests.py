@@ -1,2 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .backends import user_key
+
+User = get_user_model()
+
+
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader',
+                                             password='old-Passw0rd')
+        self.client.force_login(self.user)
+
+    def auth_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        sql = [query['sql'] for query in queries]
+        return response, [query for query in sql
+                          if 'django_session' in query
+                          or 'FROM "auth_user" WHERE "auth_user"."id"'
+                          in query]
+
+    def test_authenticated_hit_without_auth_queries(self):
+        self.client.get(reverse('posts:index'))
+        response, queries = self.auth_queries(reverse('posts:index'))
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(queries, [])
+
+    def test_user_edit_is_visible_immediately(self):
+        self.client.get(reverse('posts:index'))
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+
+    def test_password_change_logs_out_other_sessions(self):
+        other = Client()
+        other.force_login(self.user)
+        other.get(reverse('posts:index'))
+        response = self.client.post(reverse('users:password_change'), {
+            'old_password': 'old-Passw0rd',
+            'new_password1': 'new-Passw0rd-2',
+            'new_password2': 'new-Passw0rd-2',
+        })
+        self.assertRedirects(response, reverse('users:password_change_done'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        response = other.get(reverse('posts:index'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_stale_user_of_other_process_is_not_used(self):
+        """Пользователь со старым паролем, оставшийся в кэше другого
+        процесса, не выкидывает сменившего пароль и перечитывается."""
+        self.client.get(reverse('posts:index'))
+        stale = cache.get(user_key(self.user.pk))
+        self.client.post(reverse('users:password_change'), {
+            'old_password': 'old-Passw0rd',
+            'new_password1': 'new-Passw0rd-2',
+            'new_password2': 'new-Passw0rd-2',
+        })
+        cache.set(user_key(self.user.pk), stale)
+        response = self.client.get(reverse('posts:index'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertNotEqual(
+            cache.get(user_key(self.user.pk)).password, stale.password
+        )
+
+    def test_old_session_is_logged_out_by_fresh_user(self):
+        other = Client()
+        other.force_login(self.user)
+        self.user.set_password('new-Passw0rd-2')
+        User.objects.filter(pk=self.user.pk).update(
+            password=self.user.password
+        )
+        # В кэше уже пользователь с новым паролем
+        cache.set(user_key(self.user.pk), User.objects.get(pk=self.user.pk))
+        response = other.get(reverse('posts:index'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_logout_forgets_user(self):
+        self.client.get(reverse('posts:index'))
+        self.assertIsNotNone(cache.get(user_key(self.user.pk)))
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.context['user'].is_authenticated)
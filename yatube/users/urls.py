@@ -8,6 +8,8 @@ from django.contrib.auth.views import (LoginView, LogoutView,
 
 from django.urls import path, reverse_lazy
 
+from core.ratelimit import ip, ratelimit
+
 from . import views
 
 app_name = 'users'
@@ -20,7 +22,8 @@ urlpatterns = [
     ),
     path(
         'signup/',
-        views.SignUp.as_view(), name='signup'),
+        ratelimit('signup', key=ip)(views.SignUp.as_view()),
+        name='signup'),
     path(
         'password_change/done/',
         PasswordChangeDoneView.as_view
@@ -35,8 +38,11 @@ urlpatterns = [
     ),
     path(
         'password_reset/',
-        PasswordResetView.as_view
-        (template_name='users/password_reset_form.html'),
+        ratelimit('password_reset', key=ip)(
+            PasswordResetView.as_view(
+                template_name='users/password_reset_form.html'
+            )
+        ),
         name='password_reset'
     ),
     path(
@@ -47,7 +53,9 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        ratelimit('login', key=ip)(
+            LoginView.as_view(template_name='users/login.html')
+        ),
         name='login'
     ),
     path(
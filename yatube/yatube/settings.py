@@ -1,4 +1,5 @@
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -27,21 +28,62 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.staticfiles.StaticFilesMiddleware',
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.query_budget.QueryBudgetMiddleware',
+    'core.db_router.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Проверка бюджета SQL-запросов представлений (@query_budget):
+# 'log' - предупреждение в лог, 'raise' - исключение QueryBudgetExceeded
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_BUDGET_ACTION = 'log'
+
+# Адреса обратных прокси, которым верим в X-Forwarded-For (core.client_ip):
+# за прокси адрес клиента для лимитов и /metrics берется из заголовка
+TRUSTED_PROXIES = []
+
+# Ограничение частоты запросов (core.ratelimit): 'число/период', период -
+# s, m, h или d. Считаются только POST, от пользователя или с IP-адреса
+RATELIMIT_ENABLED = True
+RATE_LIMITS = {
+    'post_create': '10/m',
+    'post_edit': '30/m',
+    'signup': '5/h',
+    'login': '10/m',
+    'password_reset': '5/h',
+}
+
+# Очередь фоновых задач (core.tasks): потоков-исполнителей в каждом
+# веб-процессе (0 - только команда run_workers), как часто исполнитель
+# проверяет очередь без сигнала о новой задаче и через сколько секунд
+# занятая задача считается брошенной. В тестах потоков нет: очередь
+# выполняет run_pending()
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+TASK_WORKER_THREADS = 0 if TESTING else 2
+TASK_POLL_INTERVAL = 5
+TASK_LOCK_TIMEOUT = 10 * 60
+
+# Метрики Prometheus (core.metrics) на /metrics; выдаются только этим
+# адресам клиента (core.client_ip), пустой список - всем. Если задан
+# токен, нужен еще заголовок Authorization: Bearer <токен>
+METRICS_ENABLED = True
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -58,13 +100,45 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Соединения берутся из пула процесса (core.db.pool), а не открываются
+# на каждый запрос
+DATABASE_POOL = {
+    'MAX_SIZE': 10,
+    # Сколько секунд ждать свободного соединения
+    'TIMEOUT': 5,
+    # Соединение старше стольких секунд пересоздается
+    'MAX_LIFETIME': 600,
+    # Свободное дольше стольких секунд проверяется перед выдачей
+    'CHECK_INTERVAL': 30,
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3pool',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'POOL': DATABASE_POOL,
     }
 }
 
+# Реплика для чтения (core.db_router). Локально - второй файл SQLite,
+# который обновляет manage.py sync_replica: YATUBE_REPLICA=1 или путь
+REPLICA_DATABASE_ALIAS = 'replica'
+REPLICA = os.environ.get('YATUBE_REPLICA')
+if REPLICA:
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        'ENGINE': 'core.db.backends.sqlite3pool',
+        'POOL': DATABASE_POOL,
+        'NAME': (os.path.join(BASE_DIR, 'db-replica.sqlite3')
+                 if REPLICA == '1' else REPLICA),
+        # В тестах реплика - та же база, что и основная
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_SECONDS = 5
+# Приложения, модели которых всегда читаются из основной базы
+PRIMARY_ONLY_APPS = ('sessions', 'core')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -89,14 +163,93 @@ USE_I18N = True
 USE_L10N = True
 
 USE_TZ = True
+
+# LocMemCache свой у каждого процесса, а в кэше лежат версии лент, сессии,
+# пользователи и счетчики лимитов. Подходит только для одного веб-процесса
+# с задачами в его потоках; для нескольких процессов и run_workers нужен
+# общий кэш (Memcached, Redis, DatabaseCache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+# Сессия читается из кэша, а в базу пишется только при изменении
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Пользователь сессии берется из кэша (users.backends,
+# CachedAuthenticationMiddleware); правки, смена пароля и выход сбрасывают
+# запись, а запись со старым хэшем пароля сессии не отдается
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 5 * 60
+
+# Время жизни отрендеренного списка постов ленты, секунды.
+# Изменения постов, групп и авторов сбрасывают кэш сразу (feed_cache.touch)
+FEED_CACHE_TIMEOUT = 60 * 60
+# Время жизни карточки поста в кэше; правка поста меняет ее ключ (cards.py)
+POST_CARD_CACHE_TIMEOUT = 24 * 60 * 60
+
 PAGE_LIMIT = 10
+# Сколько последних постов выводится в RSS и Atom
+SYNDICATION_LIMIT = 20
+# Лента подписок (posts.timeline): пост раскладывается по лентам
+# подписчиков пачками, а у авторов с большим числом подписчиков
+# подмешивается при чтении
+TIMELINE_FANOUT_MAX_FOLLOWERS = 1000
+TIMELINE_BATCH_SIZE = 500
+# Сколько последних постов автора попадает в ленту при подписке
+TIMELINE_BACKFILL = 50
+# Групп на странице каталога (posts:group_index)
+GROUP_INDEX_PAGE_SIZE = 50
+# Сколько самых активных авторов выводится у группы и сколько из них
+# хранится в кэше, чтобы обновлять его новыми постами без пересчета
+GROUP_TOP_AUTHORS = 3
+GROUP_STATS_TRACKED_AUTHORS = 20
+GROUP_STATS_CACHE_TIMEOUT = 10 * 60
+# Наибольший ?limit= страницы JSON API
+API_MAX_LIMIT = 100
+# С этой страницы лента переходит с ?page=N на курсорную паджинацию
+PAGE_CURSOR_DEPTH = 5
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGINATOR_WINDOW = 2
+# Время жизни закэшированного числа постов ленты без счетчика, секунды
+PAGINATOR_COUNT_TIMEOUT = 30
+# С какого размера таблицы лента без фильтров берет оценку вместо COUNT(*)
+PAGINATOR_ESTIMATE_THRESHOLD = 100000
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# collectstatic кладет сюда файлы с хешем в имени и их .gz/.br варианты,
+# а core.staticfiles.StaticFilesMiddleware отдает их при DEBUG = False
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStorage'
+# Сколько секунд клиент кэширует статику без хеша в имени
+STATIC_CACHE_MAX_AGE = 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки больше этого размера пишутся во временный файл, а не в память
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
+
+# Загрузка картинок постов (posts.images): проверка до декодирования
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+# Картинка сохраняется вписанной в этот размер и без метаданных
+IMAGE_MAX_SIZE = (1920, 1920)
+IMAGE_JPEG_QUALITY = 85
+
+# Куда benchmark_views сохраняет отчеты, если не задан --output
+BENCHMARK_RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks')
+
+# Размеры миниатюр картинок постов: имя -> (геометрия, опции sorl)
+THUMBNAIL_GEOMETRIES = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# Картинка-заглушка, пока миниатюра не готова
+THUMBNAIL_PLACEHOLDER = 'img/placeholder.svg'
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -5,3 +5,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Исполнители фоновых задач веб-процесса; runserver тоже загружает этот
+# модуль. Импорт после настройки Django: core.tasks использует модели
+from core.tasks import start_configured_workers  # noqa: E402
+
+start_configured_workers()